@@ -5,7 +5,7 @@ import shutil
 
 from git import Repo  # gitpython
 
-from calatrava.scripts import draw_uml
+from calatrava.scripts import draw_uml_batch
 
 from utils import (
     load_data,
@@ -33,16 +33,12 @@ def clone_repo(repo_name, repo_data, force=False):
     return repo_dir
 
 
-def draw_graph(repo_name, repo_dir, graph_data):
-    if not graph_data.get("draw", True):
-        return
-
-    config_file = get_config_file(graph_data)
-    output_filename = get_output_filename(graph_data, repo_name)
-    imports = get_imports(repo_name, repo_dir, graph_data)
-
-    draw_uml(imports, output_filename=output_filename, config=config_file,
-             view=False)
+def get_view(repo_name, repo_dir, graph_data):
+    return {
+        "args": get_imports(repo_name, repo_dir, graph_data),
+        "config": get_config_file(graph_data),
+        "output_filename": get_output_filename(graph_data, repo_name),
+    }
 
 
 def main(force_clone=False):
@@ -58,13 +54,12 @@ def main(force_clone=False):
 
         repo_dir = clone_repo(repo_name, repo_data, force=force_clone)
 
-        draw_graph(repo_name, repo_dir, repo_data)
-
-        # draw additional
-        graph_data = get_additional_graph_data(repo_data)
+        # repo is parsed once for all its graphs
+        graph_data = [repo_data] + get_additional_graph_data(repo_data)
+        views = [get_view(repo_name, repo_dir, graph_data_)
+                 for graph_data_ in graph_data if graph_data_.get("draw", True)]
 
-        for graph_data_ in graph_data:
-            draw_graph(repo_name, repo_dir, graph_data_)
+        draw_uml_batch(views)
 
 
 if __name__ == '__main__':
@@ -13,12 +13,128 @@ def main_cli():
               default="calatrava_tree")
 @click.option("--output-format", type=str, default='svg')
 @click.option("--config", '-c', type=str, default=None)
-def uml(args, output_filename, output_format, config):
+@click.option("--cache", is_flag=True, default=False,
+              help="Cache parsed modules and diagrams in the global cache dirs.")
+@click.option("--cache-dir", type=str, default=None,
+              help="Cache parsed modules in the given dir.")
+@click.option("--render-cache-dir", type=str, default=None,
+              help="Cache diagrams in the given dir.")
+@click.option("--jobs", "-j", type=int, default=1,
+              help="Number of processes used for parsing (-1 for all CPUs).")
+@click.option("--exclude", "-e", type=str, multiple=True,
+              help="Pattern of files or dirs to ignore (can be repeated).")
+@click.option("--incremental", is_flag=True, default=False,
+              help="Reanalyze only what changed since the previous run.")
+@click.option("--stream", is_flag=True, default=False,
+              help="Write the graph directly to graphviz (for huge graphs).")
+@click.option("--external", type=str, multiple=True,
+              help="Installed packages where unknown bases are resolved (pattern, can be repeated).")
+@click.option("--verbose", "-v", is_flag=True, default=False,
+              help="Log resolution and cache stats.")
+def uml(args, output_filename, output_format, config, cache, cache_dir,
+        render_cache_dir, jobs, exclude, incremental, stream, external, verbose):
     """Builds UML diagram.
     """
+    from calatrava.config import (
+        get_global_cache_dir,
+        get_global_render_cache_dir,
+    )
     from calatrava.scripts import draw_uml
 
-    draw_uml(args, output_filename, output_format, config, view=True)
+    if cache and cache_dir is None:
+        cache_dir = get_global_cache_dir()
+    if cache and render_cache_dir is None:
+        render_cache_dir = get_global_render_cache_dir()
+
+    draw_uml(args, output_filename, output_format, config, view=True,
+             cache_dir=cache_dir, jobs=jobs, exclude=exclude,
+             incremental=incremental, render_cache_dir=render_cache_dir,
+             stream=stream, external=external, verbose=verbose)
+
+
+@click.command(name="uml-batch")
+@click.argument("manifest", type=str)
+@click.option("--cache", is_flag=True, default=False,
+              help="Cache parsed modules and diagrams in the global cache dirs.")
+@click.option("--cache-dir", type=str, default=None,
+              help="Cache parsed modules in the given dir.")
+@click.option("--render-cache-dir", type=str, default=None,
+              help="Cache diagrams in the given dir.")
+@click.option("--jobs", "-j", type=int, default=1,
+              help="Number of processes used for parsing (-1 for all CPUs).")
+@click.option("--exclude", "-e", type=str, multiple=True,
+              help="Pattern of files or dirs to ignore (can be repeated).")
+@click.option("--render-jobs", type=int, default=None,
+              help="Number of concurrent graphviz processes.")
+@click.option("--timeout", type=float, default=None,
+              help="Seconds allowed for rendering each diagram.")
+@click.option("--max-nodes", type=int, default=None,
+              help="Diagrams with more nodes are rendered with sfdp.")
+@click.option("--max-queued", type=int, default=None,
+              help="Diagrams built and waiting to be rendered (default 8).")
+@click.option("--external", type=str, multiple=True,
+              help="Installed packages where unknown bases are resolved (pattern, can be repeated).")
+def uml_batch(manifest, cache, cache_dir, render_cache_dir, jobs, exclude,
+              render_jobs, timeout, max_nodes, max_queued, external):
+    """Builds several UML diagrams (views listed in a json manifest).
+    """
+    from calatrava.config import (
+        get_global_cache_dir,
+        get_global_render_cache_dir,
+    )
+    from calatrava.scripts import (
+        draw_uml_batch,
+        load_views,
+    )
+    from calatrava.viz.graphviz.render import DEFAULT_MAX_QUEUED
+
+    if cache and cache_dir is None:
+        cache_dir = get_global_cache_dir()
+    if cache and render_cache_dir is None:
+        render_cache_dir = get_global_render_cache_dir()
+
+    if max_queued is None:
+        max_queued = DEFAULT_MAX_QUEUED
+
+    failures = draw_uml_batch(
+        load_views(manifest), cache_dir=cache_dir, jobs=jobs, exclude=exclude,
+        render_jobs=render_jobs, timeout=timeout, max_nodes=max_nodes,
+        render_cache_dir=render_cache_dir, external=external,
+        max_queued=max_queued)
+    if failures:
+        raise click.ClickException(f"{len(failures)} diagrams failed to render")
+
+
+@click.command()
+@click.argument("packages", nargs=-1, type=str, required=True)
+@click.option("--output-filename", "-o", type=str,
+              default="calatrava_imports")
+@click.option("--output-format", type=str, default='svg')
+@click.option("--exclude", "-e", type=str, multiple=True,
+              help="Pattern of files or dirs to ignore (can be repeated).")
+@click.option("--condense", is_flag=True, default=False,
+              help="Draw each import cycle as a single node.")
+@click.option("--draw/--no-draw", default=True,
+              help="Draw the graph or only report import cycles.")
+@click.option("--cache", is_flag=True, default=False,
+              help="Cache parsed modules in the global cache dir.")
+@click.option("--cache-dir", type=str, default=None,
+              help="Cache parsed modules in the given dir.")
+def imports(packages, output_filename, output_format, exclude, condense, draw,
+            cache, cache_dir):
+    """Builds module import graph and reports import cycles.
+    """
+    from calatrava.config import get_global_cache_dir
+    from calatrava.scripts import draw_imports
+
+    if cache and cache_dir is None:
+        cache_dir = get_global_cache_dir()
+
+    draw_imports(packages, output_filename, output_format, view=True,
+                 exclude=exclude, condense=condense, draw=draw,
+                 cache_dir=cache_dir)
 
 
 main_cli.add_command(uml)
+main_cli.add_command(uml_batch)
+main_cli.add_command(imports)
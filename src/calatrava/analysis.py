@@ -0,0 +1,224 @@
+"""Graph analytics over the resolved classes hierarchy.
+
+The hierarchy is exported to compressed sparse rows (CSR) of integer ids,
+so metrics are computed with array operations instead of recursion over
+`bases`/`children`. Requires `numpy` (`pip install calatrava[analysis]`).
+"""
+
+import numpy as np
+
+
+def _csr_from_edges(n_rows, rows, cols):
+    # rows need not be sorted; order within a row is kept
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+
+    return indptr, cols[order]
+
+
+def _csr_gather(indptr, indices, rows):
+    # (row, col) of all entries in the given rows
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = lengths.sum()
+
+    repeated_rows = np.repeat(rows, lengths)
+    offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    return repeated_rows, indices[np.repeat(starts, lengths) + offsets]
+
+
+class ClassGraph:
+    """Inheritance graph in CSR form.
+
+    Class `i` has bases `bases_indices[bases_indptr[i]:bases_indptr[i + 1]]`.
+
+    Args:
+        names (list[str]): long name of each class (index is the id).
+        package_ids (array): index in `packages_names` (-1 if not found).
+    """
+
+    def __init__(self, names, bases_indptr, bases_indices, packages_names,
+                 package_ids, is_abstract, found):
+        self.names = names
+        self.bases_indptr = bases_indptr
+        self.bases_indices = bases_indices
+        self.packages_names = packages_names
+        self.package_ids = package_ids
+        self.is_abstract = is_abstract
+        self.found = found
+
+        self._children = None
+        self._depth = None
+
+    @classmethod
+    def from_classes(cls, classes):
+        """
+        Args:
+            classes (dict or list): e.g. `PackageManager.get_classes()`.
+        """
+        if isinstance(classes, dict):
+            classes = classes.values()
+        classes = list(classes)
+
+        ids = {id(class_): index for index, class_ in enumerate(classes)}
+
+        rows = []
+        cols = []
+        for index, class_ in enumerate(classes):
+            for base in class_.bases:
+                base_index = ids.get(id(base), None)
+                # bases outside `classes` are ignored
+                if base_index is not None:
+                    rows.append(index)
+                    cols.append(base_index)
+
+        packages_ids = {}
+        package_ids = np.full(len(classes), -1, dtype=np.int64)
+        for index, class_ in enumerate(classes):
+            if class_.found:
+                package_name = class_.module.package.name
+                package_ids[index] = packages_ids.setdefault(package_name,
+                                                             len(packages_ids))
+
+        bases_indptr, bases_indices = _csr_from_edges(
+            len(classes), np.array(rows, dtype=np.int64),
+            np.array(cols, dtype=np.int64))
+
+        return cls(
+            names=[class_.long_name for class_ in classes],
+            bases_indptr=bases_indptr,
+            bases_indices=bases_indices,
+            packages_names=list(packages_ids),
+            package_ids=package_ids,
+            is_abstract=np.array([class_.is_abstract for class_ in classes], dtype=bool),
+            found=np.array([class_.found for class_ in classes], dtype=bool),
+        )
+
+    @property
+    def n_classes(self):
+        return len(self.names)
+
+    @property
+    def children(self):
+        # transposed CSR: (indptr, indices)
+        if self._children is None:
+            rows = np.repeat(np.arange(self.n_classes), self.fan_out())
+            self._children = _csr_from_edges(self.n_classes, self.bases_indices, rows)
+
+        return self._children
+
+    def fan_out(self):
+        """Number of (direct) bases of each class."""
+        return np.diff(self.bases_indptr)
+
+    def fan_in(self):
+        """Number of (direct) subclasses of each class."""
+        return np.diff(self.children[0])
+
+    def depth(self):
+        """Depth of inheritance (longest path to a class without bases).
+
+        Classes in inheritance cycles (badly resolved names) get -1.
+        """
+        if self._depth is not None:
+            return self._depth
+
+        children_indptr, children_indices = self.children
+
+        depth = np.full(self.n_classes, -1, dtype=np.int64)
+        pending = self.fan_out().copy()
+
+        # level-synchronous topological sort: a class is reached when
+        # all its bases are
+        frontier = np.flatnonzero(pending == 0)
+        level = 0
+        while frontier.size:
+            depth[frontier] = level
+
+            _, reached = _csr_gather(children_indptr, children_indices, frontier)
+            np.subtract.at(pending, reached, 1)
+
+            frontier = np.unique(reached[pending[reached] == 0])
+            level += 1
+
+        self._depth = depth
+        return depth
+
+    def n_descendants(self, block_size=4096):
+        """Number of (direct or indirect) subclasses of each class.
+
+        Ancestors are propagated as bitsets, level by level, for blocks of
+        `block_size` classes at a time (bounded memory).
+        """
+        depth = self.depth()
+        counts = np.zeros(self.n_classes, dtype=np.int64)
+        if self.n_classes == 0:
+            return counts
+
+        rows, cols = _csr_gather(self.bases_indptr, self.bases_indices,
+                                 np.arange(self.n_classes))
+        edges_depth = depth[rows]
+
+        # edges of classes at each depth (cycles are ignored)
+        levels = [np.flatnonzero(edges_depth == level)
+                  for level in range(1, depth.max() + 1)]
+
+        n_bytes = (block_size + 7) // 8
+        for start in range(0, self.n_classes, block_size):
+            stop = min(start + block_size, self.n_classes)
+
+            ancestors = np.zeros((self.n_classes, n_bytes), dtype=np.uint8)
+            for edges in levels:
+                children_ = rows[edges]
+                bases = cols[edges]
+
+                values = ancestors[bases]
+                in_block = (bases >= start) & (bases < stop)
+                offsets = bases[in_block] - start
+                values[np.flatnonzero(in_block), offsets // 8] |= (
+                    np.left_shift(1, 7 - offsets % 8).astype(np.uint8))
+
+                np.bitwise_or.at(ancestors, children_, values)
+
+            for row_start in range(0, self.n_classes, block_size):
+                counts[start:stop] += np.unpackbits(
+                    ancestors[row_start:row_start + block_size], axis=1,
+                    count=stop - start).sum(axis=0, dtype=np.int64)
+
+        return counts
+
+    def abstract_ratio_by_package(self):
+        """
+        Returns:
+            dict: package name -> ratio of abstract (found) classes.
+        """
+        mask = self.package_ids >= 0
+        n_packages = len(self.packages_names)
+
+        totals = np.bincount(self.package_ids[mask], minlength=n_packages)
+        abstract = np.bincount(self.package_ids[mask],
+                               weights=self.is_abstract[mask],
+                               minlength=n_packages)
+
+        return {name: float(abstract[index] / totals[index])
+                for index, name in enumerate(self.packages_names)}
+
+    def top(self, values, k=10):
+        """
+        Args:
+            values (array): metric of each class (e.g. `fan_in()`).
+
+        Returns:
+            list[tuple]: (long name, value) of the `k` classes with largest
+                values.
+        """
+        k = min(k, self.n_classes)
+        if k == 0:
+            return []
+
+        indices = np.argpartition(-values, k - 1)[:k]
+        indices = indices[np.argsort(-values[indices], kind='stable')]
+
+        return [(self.names[index], values[index].item()) for index in indices]
@@ -0,0 +1,200 @@
+
+import hashlib
+import os
+from pathlib import Path
+import pickle
+import shutil
+import sys
+import threading
+
+import calatrava
+from calatrava.parser.ast.facts import FACTS_VERSION
+
+
+DEFAULT_MAX_SIZE = 256 * 1024 ** 2  # bytes
+
+
+def hash_bytes(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def hash_file(path):
+    with open(path, 'rb') as file:
+        return hash_bytes(file.read())
+
+
+class DiskCache:
+    # entries are files; least recently used are evicted above `max_size`
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+        self.path = Path(path).expanduser()
+        self.max_size = max_size
+
+        self._size = None
+
+    def _get_entry_path(self, key):
+        return self.path / key[:2] / key
+
+    def _get_entries(self):
+        if not self.path.exists():
+            return []
+
+        entries = []
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    entries.append((path, os.stat(path)))
+                except FileNotFoundError:
+                    continue
+
+        return entries
+
+    @property
+    def size(self):
+        if self._size is None:
+            self._size = sum(stat.st_size for _, stat in self._get_entries())
+
+        return self._size
+
+    def touch(self, key):
+        try:
+            os.utime(self._get_entry_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _write(self, key, write_func):
+        entry_path = self._get_entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+        old_size = entry_path.stat().st_size if entry_path.exists() else 0
+
+        # write and rename to never expose partial entries
+        tmp_path = entry_path.with_name(
+            f'.{entry_path.name}.{os.getpid()}.{threading.get_ident()}')
+        write_func(tmp_path)
+        os.replace(tmp_path, entry_path)
+
+        self._size = self.size + entry_path.stat().st_size - old_size
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self, max_size=None):
+        if max_size is None:
+            max_size = self.max_size
+
+        entries = sorted(self._get_entries(), key=lambda entry: entry[1].st_mtime)
+        size = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if size <= max_size:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= stat.st_size
+
+        self._size = size
+
+    def clear(self):
+        self.evict(max_size=0)
+
+
+class ParseCache(DiskCache):
+    """Stores extracted module facts, skipping parsing of unchanged files.
+
+    Entries are keyed by file path, calatrava, Python and facts format
+    versions and the kind of facts. They are validated against size and mtime, and against
+    the content hash when the file was touched but not modified.
+    """
+
+    def _get_key(self, path, facts_key):
+        key = '|'.join([
+            calatrava.__version__, sys.version, str(FACTS_VERSION), str(facts_key),
+            os.path.abspath(path),
+        ])
+        return hash_bytes(key.encode())
+
+    def load(self, path, facts_key, stat=None):
+        key = self._get_key(path, facts_key)
+        entry_path = self._get_entry_path(key)
+
+        try:
+            with open(entry_path, 'rb') as file:
+                entry = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError):
+            return None
+
+        if stat is None:
+            stat = os.stat(path)
+
+        if (entry['mtime_ns'], entry['size']) != (stat.st_mtime_ns, stat.st_size):
+            if stat.st_size != entry['size'] or hash_file(path) != entry['hash']:
+                return None
+
+            # same content: refresh stats to avoid hashing next time
+            self.store(path, facts_key, entry['facts'], stat=stat,
+                       hash_=entry['hash'])
+        else:
+            self.touch(key)
+
+        return entry['facts']
+
+    def store(self, path, facts_key, facts, stat=None, hash_=None):
+        if stat is None:
+            stat = os.stat(path)
+
+        if hash_ is None:
+            hash_ = hash_file(path)
+
+        entry = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'hash': hash_,
+            'facts': facts,
+        }
+
+        def _write(entry_path):
+            with open(entry_path, 'wb') as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._write(self._get_key(path, facts_key), _write)
+
+
+def _copy(src, dst):
+    # replaces `dst` without exposing partial files (not linked: a later
+    # render to `dst` would overwrite the entry)
+    tmp_path = f'{dst}.{os.getpid()}.{threading.get_ident()}'
+    try:
+        shutil.copyfile(src, tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, dst)
+
+
+class RenderCache(DiskCache):
+    """Stores rendered diagrams, keyed by their source, format and engine.
+
+    Cached files are copied to the requested output.
+    """
+
+    def get_key(self, source, format, engine):
+        return hash_bytes(f'{format}|{engine}|{source}'.encode())
+
+    def load(self, key, output_path):
+        entry_path = self._get_entry_path(key)
+        try:
+            _copy(entry_path, output_path)
+        except FileNotFoundError:
+            return False
+
+        self.touch(key)
+        return True
+
+    def store(self, key, output_path):
+        self._write(key, lambda entry_path: shutil.copyfile(output_path, entry_path))
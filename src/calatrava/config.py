@@ -15,6 +15,14 @@ def get_global_config_file():
         return str(path)
 
 
+def get_global_cache_dir():
+    return str(Path.home() / '.calatrava' / 'cache')
+
+
+def get_global_render_cache_dir():
+    return str(Path.home() / '.calatrava' / 'renders')
+
+
 def load_from_config(filename=None):
     if filename is None:
         filename = get_global_config_file()
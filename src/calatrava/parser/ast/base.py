@@ -1,24 +1,59 @@
 
 from abc import ABCMeta
+from collections.abc import Mapping
 import os
 import ast
 import pkgutil
 import logging
-import glob
+import fnmatch
 from pathlib import Path
 import tokenize
 
 
+def load_root(path):
+    with tokenize.open(path) as file:
+        root = ast.parse(file.read(), path)
+
+    return root
+
+
+class _ModulesView(Mapping):
+    # modules of all packages, without merging dicts
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def __getitem__(self, long_name):
+        package = self.manager._get_package(long_name)
+        if package is None:
+            raise KeyError(long_name)
+
+        return package.modules[long_name]
+
+    def __iter__(self):
+        for package in self.manager.packages_ls:
+            yield from package.modules
+
+    def __len__(self):
+        return sum(len(package.modules) for package in self.manager.packages_ls)
+
+
 class BasePackageManager:
 
     def __init__(self, packages_ls):
-        self.packages_ls = packages_ls
-
-        self._set_manager(packages_ls)
+        self.packages_ls = []
+        self._packages = {}
 
-    def _set_manager(self, packages_ls):
         for package in packages_ls:
-            package.manager = self
+            self.add_package(package)
+
+        self._modules = _ModulesView(self)
+
+    def add_package(self, package):
+        package.manager = self
+
+        self.packages_ls.append(package)
+        self._packages[package.name] = package
 
     def _get_package(self, long_name, raise_=False):
         package_name = long_name.split('.')[0]
@@ -31,14 +66,12 @@ class BasePackageManager:
 
     @property
     def packages(self):
-        return {package.name: package for package in self.packages_ls}
+        return self._packages
 
     @property
     def modules(self):
-        modules = {}
-        for package in self.packages_ls:
-            modules |= package.modules
-        return modules
+        # read-only view (copy with `dict` before modifying)
+        return self._modules
 
     def find_module(self, long_name):
         package = self._get_package(long_name, raise_=True)
@@ -58,9 +91,99 @@ class BasePackageManagerMixins(metaclass=ABCMeta):
     pass
 
 
+EXTRA_MODULES_EXTENSIONS = ('.pyi', '.pyi.in', '.pyx', '.pyc')
+
+SKIPPED_DIRS = {'__pycache__', 'site-packages', 'node_modules'}
+
+
+class PackageScan:
+
+    def __init__(self):
+        self.modules_names = set()
+        self.extra_modules_names = set()
+        self.subpackages_names = set()
+
+        self.modules_paths = {}
+        self.modules_stats = {}
+        self.init_modules_names = set()
+
+
+def _is_excluded(entry, rel_path, exclude):
+    for pattern in exclude:
+        if fnmatch.fnmatch(entry.name, pattern) or fnmatch.fnmatch(rel_path, pattern):
+            return True
+
+    return False
+
+
+def _get_import_name(rel_path):
+    # rel_path is relative to package root path
+    import_ = rel_path.split('.')[0].replace('/', '.')
+
+    # remove init
+    return import_[:-9] if import_.endswith('__init__') else import_
+
+
+def scan_package(path, exclude=()):
+    """Classifies package files and subpackages in a single walk.
+
+    Hidden entries, `__pycache__`, virtual environments and entries
+    matching any of the `exclude` patterns (names or posix paths relative
+    to the package root) are not visited.
+    """
+    path = Path(path)
+    scan = PackageScan()
+
+    stack = [(str(path), path.name)]
+    while stack:
+        dir_path, dir_rel_path = stack.pop()
+
+        try:
+            with os.scandir(dir_path) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+
+            rel_path = f'{dir_rel_path}/{entry.name}'
+            if _is_excluded(entry, rel_path, exclude):
+                continue
+
+            if entry.is_dir():
+                if (entry.name in SKIPPED_DIRS
+                        or os.path.exists(os.path.join(entry.path, 'pyvenv.cfg'))):
+                    continue
+
+                if dir_rel_path == path.name:
+                    scan.subpackages_names.add(_get_import_name(rel_path))
+
+                stack.append((entry.path, rel_path))
+
+            elif entry.name.endswith('.py'):
+                import_ = _get_import_name(rel_path)
+                scan.modules_names.add(import_)
+
+                is_init = entry.name == '__init__.py'
+                if is_init:
+                    scan.init_modules_names.add(import_)
+
+                # `<name>.py` takes precedence over `<name>/__init__.py`
+                if not is_init or import_ not in scan.modules_paths:
+                    scan.modules_paths[import_] = entry.path
+                    scan.modules_stats[import_] = entry.stat()
+
+            elif entry.name.endswith(EXTRA_MODULES_EXTENSIONS):
+                scan.extra_modules_names.add(_get_import_name(rel_path))
+
+    return scan
+
+
 class BasePackage:
 
-    def __init__(self, path, Module):
+    def __init__(self, path, Module, exclude=(), scan=None):
 
         path_exists = os.path.exists(path)
         if not path_exists or (path_exists and not os.path.isdir(path)):
@@ -73,10 +196,18 @@ class BasePackage:
 
         self.path = Path(path)
         self.modules_ls = []
+        self._modules = {}
 
-        self.modules_names = self._get_modules_names()
-        self.extra_modules_names = self._get_extra_modules_names()
-        self.subpackages_names = self._get_subpackages_names()
+        self.exclude = exclude
+
+        if scan is None:
+            scan = scan_package(self.path, exclude=exclude)
+        self.modules_names = scan.modules_names
+        self.extra_modules_names = scan.extra_modules_names
+        self.subpackages_names = scan.subpackages_names
+        self.modules_paths = scan.modules_paths
+        self.modules_stats = scan.modules_stats
+        self.init_modules_names = scan.init_modules_names
 
         self.manager = self  # to work in basic case
 
@@ -84,7 +215,7 @@ class BasePackage:
 
     @property
     def modules(self):
-        return {module.long_name: module for module in self.modules_ls}
+        return self._modules
 
     @property
     def name(self):
@@ -94,43 +225,18 @@ class BasePackage:
     def root_path(self):
         return self.path.parent
 
-    def _get_modules_names(self):
-        sep = os.path.sep
-        paths = glob.glob(f'{self.path}{sep}**{sep}*.py', recursive=True)
-        imports = [str(Path(path).relative_to(self.root_path)).split('.')[0].replace(os.path.sep, '.') for path in paths]
-
-        # remove init
-        imports = [import_[:-9] if import_.endswith('__init__') else import_ for import_ in imports]
-
-        return set(imports)
-
-    def _get_extra_modules_names(self):
-        sep = os.path.sep
-        paths = []
-        for ext in ["pyi", "pyi.in", "pyx", "pyc"]:
-            paths.extend(glob.glob(f'{self.path}{sep}**{sep}*.{ext}', recursive=True))
-        imports = [str(Path(path).relative_to(self.root_path)).split('.')[0].replace(os.path.sep, '.') for path in paths]
-
-        # remove init
-        imports = [import_[:-9] if import_.endswith('__init__') else import_ for import_ in imports]
-
-        return set(imports)
-
-    def _get_subpackages_names(self):
-        sep = os.path.sep
-        paths = [path for path in glob.glob(f'{self.path}{sep}*{sep}', recursive=True) if not path.endswith('__pycache__/')]
-        imports = [str(Path(path).relative_to(self.root_path)).split('.')[0].replace(os.path.sep, '.') for path in paths]
-
-        return set(imports)
-
     def find_module(self, long_name):
-        module = self.modules.get(long_name, None)
+        module = self._modules.get(long_name, None)
         if module is None and long_name in self.modules_names:
             module = self.Module(long_name, self)
-            self.modules_ls.append(module)
+            self.add_module(module)
 
         return module
 
+    def add_module(self, module):
+        self.modules_ls.append(module)
+        self._modules[module.long_name] = module
+
     def find_modules(self):
         modules = self.modules
         for module_name in self.modules_names:
@@ -152,7 +258,25 @@ class BaseModule:
         self.long_name = long_name
         self.package = package
 
-        self.root = self._load_root()
+        self._root = None
+        self._path = None
+        self._is_init = None
+
+    @property
+    def root(self):
+        # parsed on demand
+        if self._root is None:
+            self._root = self._load_root()
+
+        return self._root
+
+    @property
+    def has_root(self):
+        return self._root is not None
+
+    def release_root(self):
+        # reloaded if needed again
+        self._root = None
 
     @property
     def id(self):
@@ -160,7 +284,14 @@ class BaseModule:
 
     @property
     def is_init(self):
-        return os.path.exists(self._get_init_path())
+        if self._is_init is None:
+            init_modules_names = getattr(self.package, 'init_modules_names', None)
+            if init_modules_names is not None:
+                self._is_init = self.long_name in init_modules_names
+            else:
+                self._is_init = os.path.exists(self._get_init_path())
+
+        return self._is_init
 
     @property
     def package_root(self):
@@ -174,17 +305,25 @@ class BaseModule:
         return f"{path_beginning}{os.path.sep}__init__.py"
 
     def _load_root(self):
-        with tokenize.open(self.path) as file:
-            root = ast.parse(file.read(), self.path)
+        return load_root(self.path)
 
-        return root
+    @property
+    def stat(self):
+        # as collected when scanning the package
+        return getattr(self.package, 'modules_stats', {}).get(self.long_name, None)
 
     @property
     def path(self):
-        name = self._get_path_beginning()
-        path = f"{name}.py"
+        if self._path is None:
+            self._path = getattr(self.package, 'modules_paths', {}).get(self.long_name, None)
+
+        if self._path is None:
+            name = self._get_path_beginning()
+            path = f"{name}.py"
+
+            self._path = path if os.path.exists(path) else self._get_init_path(name)
 
-        return path if os.path.exists(path) else self._get_init_path(name)
+        return self._path
 
 
 class BaseModuleMixins(metaclass=ABCMeta):
@@ -0,0 +1,214 @@
+"""On demand resolution of names from packages not given to the manager.
+
+Installed packages are located with `importlib.util.find_spec` (only for
+top-level names, so nothing is imported) and their modules are found by
+checking the file system when a name is looked up. Only the modules
+reached while resolving are parsed.
+
+Stubs are preferred: a `<name>-stubs` package (PEP 561) or a `.pyi` file
+next to the module.
+"""
+
+from collections.abc import Set
+import fnmatch
+import importlib.util
+import os
+from pathlib import Path
+
+from calatrava.parser.ast.base import (
+    EXTRA_MODULES_EXTENSIONS,
+    PackageScan,
+)
+from calatrava.parser.ast.uml import Package
+
+
+COMPILED_MODULES_PATTERNS = ('*.so', '*.pyd')
+
+
+def _find_spec(name):
+    try:
+        return importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+
+
+def find_package_bases(name):
+    """Paths (without suffix) where a top-level package or module may be.
+
+    Returns:
+        list[Path]: stubs first. Empty if not installed or not inspectable
+            (e.g. built-in modules).
+    """
+    bases = []
+    for spec_name in (f'{name}-stubs', name):
+        spec = _find_spec(spec_name)
+        if spec is None:
+            continue
+
+        if spec.submodule_search_locations:
+            bases.extend(Path(location) for location in spec.submodule_search_locations)
+        elif spec.has_location:
+            bases.append(Path(spec.origin).parent / name)
+
+    return bases
+
+
+class _LazyNames(Set):
+    # membership is checked on demand (and memoized)
+
+    def __init__(self, contains):
+        self._contains = contains
+        self._known = {}
+
+    def add(self, name):
+        self._known[name] = True
+
+    @property
+    def checked(self):
+        # name -> found, for the names checked so far
+        return dict(self._known)
+
+    def __contains__(self, name):
+        found = self._known.get(name, None)
+        if found is None:
+            found = self._known[name] = self._contains(name)
+
+        return found
+
+    def __iter__(self):
+        return (name for name, found in self._known.items() if found)
+
+    def __len__(self):
+        return sum(self._known.values())
+
+
+class ExternalPackageScan(PackageScan):
+    """Scan that only knows the modules that were looked up.
+
+    Args:
+        bases (list[Path]): see `find_package_bases`.
+    """
+
+    def __init__(self, name, bases):
+        super().__init__()
+        self.name = name
+        self.bases = bases
+
+        self.modules_names = _LazyNames(self._find_module)
+        self.extra_modules_names = _LazyNames(self._find_extra_module)
+
+    def restore(self, modules_paths, init_modules_names=(), extra_modules_names=()):
+        # e.g. from a snapshot (files are not checked again)
+        for long_name, path in modules_paths.items():
+            self.modules_names.add(long_name)
+            self.modules_paths[long_name] = path
+
+        self.init_modules_names.update(init_modules_names)
+        for long_name in extra_modules_names:
+            self.extra_modules_names.add(long_name)
+
+    def _get_modules_bases(self, long_name):
+        package_name, *rel_path = long_name.split('.')
+        if package_name != self.name:
+            return []
+
+        return [base.joinpath(*rel_path) for base in self.bases]
+
+    def _find_module(self, long_name):
+        for base in self._get_modules_bases(long_name):
+            candidates = (
+                (base.with_name(f'{base.name}.pyi'), False),
+                (base.with_name(f'{base.name}.py'), False),
+                (base / '__init__.pyi', True),
+                (base / '__init__.py', True),
+            )
+            for path, is_init in candidates:
+                if path.is_file():
+                    self.modules_paths[long_name] = str(path)
+                    self.modules_stats[long_name] = os.stat(path)
+                    if is_init:
+                        self.init_modules_names.add(long_name)
+
+                    return True
+
+        return False
+
+    def _find_extra_module(self, long_name):
+        for base in self._get_modules_bases(long_name):
+            for extension in EXTRA_MODULES_EXTENSIONS:
+                if base.with_name(f'{base.name}{extension}').exists():
+                    return True
+
+            for pattern in COMPILED_MODULES_PATTERNS:
+                if next(base.parent.glob(f'{base.name}{pattern}'), None) is not None:
+                    return True
+
+        return False
+
+
+class ExternalPackage(Package):
+    # not scanned: modules are found when looked up
+
+    def __init__(self, name, bases, scan=None, **kwargs):
+        self._name = name
+        self.bases = bases
+
+        if scan is None:
+            scan = ExternalPackageScan(name, bases)
+
+        path = bases[0] if bases[0].is_dir() else bases[0].parent
+        super().__init__(path, scan=scan, **kwargs)
+
+    @property
+    def name(self):
+        return self._name
+
+
+class ExternalResolver:
+    """Finds installed packages for names the manager does not know.
+
+    Args:
+        patterns (list[str]): names of the top-level packages that may be
+            resolved (e.g. `torch` or `*` for any installed package).
+        cache (ParseCache): shared by all external packages (facts of
+            installed packages rarely change, so a global cache pays off).
+    """
+
+    def __init__(self, patterns=('*',), classes_visitor="basic", cache=None):
+        self.patterns = tuple(patterns)
+        self.classes_visitor = classes_visitor
+        self.cache = cache
+
+        # name -> package (None if not available)
+        self.packages = {}
+
+    @property
+    def packages_ls(self):
+        return [package for package in self.packages.values() if package is not None]
+
+    def _is_allowed(self, name):
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.patterns)
+
+    def find_package(self, long_name, manager):
+        name = long_name.split('.')[0]
+        if name in self.packages:
+            return self.packages[name]
+
+        package = None
+        if name not in manager.packages and self._is_allowed(name):
+            bases = find_package_bases(name)
+            if bases:
+                package = ExternalPackage(name, bases,
+                                          classes_visitor=self.classes_visitor,
+                                          cache=self.cache, keep_ast=False)
+                package.manager = manager
+
+        self.packages[name] = package
+        return package
+
+    def get_classes(self):
+        classes = {}
+        for package in self.packages_ls:
+            classes |= package.get_classes()
+
+        return classes
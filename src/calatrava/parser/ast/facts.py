@@ -0,0 +1,153 @@
+"""Facts of modules: a picklable summary of all that is needed after parsing.
+
+Facts are extracted in a single traversal and shared (through the parse
+cache) by the classes (`uml`) and imports (`find_imports`) parsers.
+"""
+
+import ast
+
+from calatrava.parser.ast.base import BaseModuleMixins
+from calatrava.parser.ast.node_visitors import SymbolTable
+
+
+# part of the keys of cached facts: bumped when `ModuleFacts` changes
+FACTS_VERSION = 2
+
+
+class ModuleFacts:
+    # picklable summary of a module (all that is needed after parsing)
+
+    def __init__(self, classes, class_defs, top_level, imports, star_imports,
+                 assignments, all_names=None, imported_names=None):
+        # each record contains the facts of the classes created by visiting
+        # a class definition (i.e. the class itself and nested classes)
+        self.classes = classes
+        self.class_defs = class_defs
+        self.top_level = top_level
+
+        self.imports = imports
+        self.star_imports = star_imports
+        self.assignments = assignments
+        self.all_names = all_names
+
+        # all imports in source order (see `find_imports`)
+        self.imported_names = imported_names
+
+    def find_class_record(self, name):
+        index = self.class_defs.get(name, None)
+        if index is not None:
+            return self.classes[index]
+
+    def find_import(self, name):
+        return self.imports.get(name, None)
+
+    def get_top_level_records(self):
+        return [self.classes[index] for index in self.top_level]
+
+    def get_bound_names(self):
+        # names bound in the module namespace (as far as facts know)
+        names = list(self.class_defs)
+        names.extend(name for name in self.imports if name != '*')
+        names.extend(self.assignments)
+
+        return names
+
+
+def extract_module_facts(root, long_name, is_init, ClassesVisitor=None):
+    """Facts of a module: the module is traversed once (see `SymbolTable`)
+    and the classes visitor only visits class definitions.
+
+    If `ClassesVisitor` is None, classes records are not extracted.
+    """
+    symbols = SymbolTable(root, long_name, is_init)
+    if ClassesVisitor is None:
+        return ModuleFacts(
+            classes=[],
+            class_defs={},
+            top_level=[],
+            imports=symbols.imports,
+            star_imports=symbols.star_imports,
+            assignments=symbols.assignments,
+            all_names=symbols.all_names,
+            imported_names=symbols.imported_names,
+        )
+
+    classes_visitor = ClassesVisitor(None)
+
+    top_level_nodes = [node for node in root.body if isinstance(node, ast.ClassDef)]
+
+    records = []
+    indices = {}
+    for node in top_level_nodes + list(symbols.class_defs.values()):
+        if id(node) in indices:
+            continue
+
+        n_classes = len(classes_visitor.classes_ls)
+        classes_visitor.visit(node)
+
+        indices[id(node)] = len(records)
+        records.append([class_.get_facts()
+                        for class_ in classes_visitor.classes_ls[n_classes:]])
+
+    return ModuleFacts(
+        classes=records,
+        class_defs={name: indices[id(node)]
+                    for name, node in symbols.class_defs.items()},
+        top_level=[indices[id(node)] for node in top_level_nodes],
+        imports=symbols.imports,
+        star_imports=symbols.star_imports,
+        assignments=symbols.assignments,
+        all_names=symbols.all_names,
+        imported_names=symbols.imported_names,
+    )
+
+
+class FactsModuleMixins(BaseModuleMixins):
+    # facts are loaded from the package cache or extracted with the
+    # module `ClassesVisitor` (None to skip classes)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._facts = None
+
+    @property
+    def facts(self):
+        if self._facts is None:
+            self._facts = self._load_facts()
+
+        return self._facts
+
+    @property
+    def has_facts(self):
+        return self._facts is not None
+
+    @property
+    def _use_cache(self):
+        return self.package.cache is not None and self.package.facts_key is not None
+
+    def _load_facts(self):
+        if self.load_cached_facts():
+            return self._facts
+
+        facts = extract_module_facts(self.root, self.long_name, self.is_init,
+                                     self.ClassesVisitor)
+        self.set_facts(facts)
+
+        if not self.package.keep_ast:
+            self.release_root()
+
+        return facts
+
+    def load_cached_facts(self):
+        if self._use_cache:
+            self._facts = self.package.cache.load(
+                self.path, self.package.facts_key, stat=self.stat)
+
+        return self.has_facts
+
+    def set_facts(self, facts):
+        self._facts = facts
+
+        if self._use_cache:
+            self.package.cache.store(self.path, self.package.facts_key, facts,
+                                     stat=self.stat)
@@ -1,58 +1,118 @@
 
-import ast
-
 from calatrava.parser.ast.base import (
     BaseModule,
-    BaseModuleMixins,
     BasePackage,
     BasePackageMixins,
     BasePackageManager,
     BasePackageManagerMixins,
 )
-from calatrava.parser.ast.node_visitors import (
-    get_import_from_module_name,
-)
+from calatrava.parser.ast.facts import FactsModuleMixins
+from calatrava.parser.ast.node_visitors import SymbolTable
+from calatrava.parser.ast.uml import get_classes_visitor
 
 
-class ImportsVisitor(ast.NodeVisitor):
+class ImportsVisitor:
+    # imports are extracted with the other module facts (`ModuleFacts`);
+    # kept for custom modules, collects the imports of a tree in source order
 
     def __init__(self, module):
         self.module = module
 
-    def visit_Import(self, node):
-        self.module.imports.extend([node.name for node in node.names])
+    def visit(self, root):
+        symbols = SymbolTable(root, self.module.long_name, self.module.is_init)
+        self.module.imports.extend(symbols.imported_names)
+
+
+class ModulesTrie:
+    """Prefix tree of modules names (split by dots).
+
+    Finds the module of an import in the number of parts of the import.
+    """
+
+    _END = None
 
-    def visit_ImportFrom(self, node):
-        node_module = get_import_from_module_name(
-            node, self.module.long_name, self.module.is_init)
+    def __init__(self, modules_names=()):
+        self.root = {}
+        for module_name in modules_names:
+            self.add(module_name)
 
-        self.module.imports.extend(
-            [f"{node_module}.{name.name}" for name in node.names]
-        )
+    def add(self, module_name):
+        node = self.root
+        for part in module_name.split('.'):
+            node = node.setdefault(part, {})
 
+        node[self._END] = module_name
 
-class ModuleMixins(BaseModuleMixins):
+    def find_longest_prefix(self, name):
+        """Longest module name that is `name` or a dotted prefix of it.
+        """
+        found = None
+        node = self.root
+        for part in name.split('.'):
+            node = node.get(part, None)
+            if node is None:
+                break
 
-    def __init__(self, ImportsVisitor, **kwargs):
+            found = node.get(self._END, found)
+
+        return found
+
+
+class ModuleMixins(FactsModuleMixins):
+
+    def __init__(self, ImportsVisitor=None, **kwargs):
         super().__init__(**kwargs)
-        self.imports_visitor = ImportsVisitor(self)
         self.imports = []
 
+        # if None, imports come from the module facts
+        self.imports_visitor = ImportsVisitor(self) if ImportsVisitor is not None else None
+
+        self._split_imports_len = None
+        self._internal_imports = []
+        self._external_imports = []
+        # (trie, imports) of the last trie
+        self._module_level_internal_imports = None
+
+    @property
+    def ClassesVisitor(self):
+        # facts are shared with `uml` (see `Package`)
+        return self.package.ClassesVisitor
+
     def get_imports(self):
         if len(self.imports) == 0:
-            self.imports_visitor.visit(self.root)
+            if self.imports_visitor is not None:
+                self.imports_visitor.visit(self.root)
+            else:
+                self.imports.extend(self.facts.imported_names)
 
         return self.imports
 
+    def _split_imports(self):
+        # recomputed only if imports changed
+        if self._split_imports_len != len(self.imports):
+            package_name = self.package.name
+            internal_imports = []
+            external_imports = []
+            for name in self.imports:
+                if name.split('.', 1)[0] == package_name:
+                    internal_imports.append(name)
+                else:
+                    external_imports.append(name)
+
+            self._internal_imports = internal_imports
+            self._external_imports = external_imports
+            self._split_imports_len = len(self.imports)
+            self._module_level_internal_imports = None
+
     @property
     def internal_imports(self):
-        package_name = self.package.name
-        return [name for name in self.imports if name.split('.')[0] == package_name]
+        self._split_imports()
+        return self._internal_imports
 
     @property
     def external_imports(self):
-        package_name = self.package.name
-        return [name for name in self.imports if name.split('.')[0] != package_name]
+        self._split_imports()
+        return self._external_imports
 
     @property
     def has_imports(self):
@@ -71,17 +131,44 @@ class ModuleMixins(BaseModuleMixins):
         return False
 
     def get_module_level_internal_imports(self, modules_names):
+        """
+        Args:
+            modules_names (set or ModulesTrie): results are memoized for the
+                last trie (build it once to resolve many modules).
+        """
+        if not isinstance(modules_names, ModulesTrie):
+            return self._get_module_level_internal_imports(modules_names)
+
+        # memo is reset if imports changed
+        internal_imports = self.internal_imports
+        memo = self._module_level_internal_imports
+        if memo is not None and memo[0] is modules_names:
+            return memo[1]
+
+        imports = []
+        for import_ in internal_imports:
+            module_name = modules_names.find_longest_prefix(import_)
+            if module_name is None:
+                raise Exception(f"Cannot handle `{import_}`.")
+
+            imports.append(module_name)
+
+        self._module_level_internal_imports = (modules_names, imports)
+
+        return imports
+
+    def _get_module_level_internal_imports(self, modules_names):
+        # longest prefix in the set (a trie is not worth it for one module)
         imports = []
         for import_ in self.internal_imports:
-            import_initial = import_
-            while True:
-                if import_ in modules_names:
-                    imports.append(import_)
+            import_ls = import_.split('.')
+            for i in range(len(import_ls), 0, -1):
+                module_name = '.'.join(import_ls[:i])
+                if module_name in modules_names:
+                    imports.append(module_name)
                     break
-
-                import_ = '.'.join(import_.split(".")[:-1])
-                if import_ == "":
-                    raise Exception(f"Cannot handle `{import_initial}`.")
+            else:
+                raise Exception(f"Cannot handle `{import_}`.")
 
         return imports
 
@@ -90,15 +177,21 @@ class ModuleMixins(BaseModuleMixins):
 
 
 class Module(ModuleMixins, BaseModule):
-    # TODO: pass ImportsVisitor in package instead
 
-    def __init__(self, long_name, package, ImportsVisitor=ImportsVisitor):
+    def __init__(self, long_name, package, ImportsVisitor=None):
         super().__init__(long_name=long_name, package=package,
                          ImportsVisitor=ImportsVisitor)
 
 
 class PackageMixins(BasePackageMixins):
 
+    @property
+    def modules_trie(self):
+        if getattr(self, '_modules_trie', None) is None:
+            self._modules_trie = ModulesTrie(self.modules_names)
+
+        return self._modules_trie
+
     def get_imports(self):
         imports = []
         for module in self.modules_ls:
@@ -109,8 +202,17 @@ class PackageMixins(BasePackageMixins):
 
 class Package(PackageMixins, BasePackage):
 
-    def __init__(self, path, Module=Module):
-        super().__init__(path=path, Module=Module)
+    def __init__(self, path, Module=Module, exclude=(), cache=None,
+                 classes_visitor=None, keep_ast=False):
+        # facts of a classes visitor are shared with `uml` (if cached),
+        # otherwise classes are not extracted
+        self.cache = cache
+        self.facts_key = classes_visitor or "imports"
+        self.keep_ast = keep_ast
+        self.ClassesVisitor = (get_classes_visitor(classes_visitor)
+                               if classes_visitor is not None else None)
+
+        super().__init__(path=path, Module=Module, exclude=exclude)
 
 
 class PackageManagerMixins(BasePackageManagerMixins):
@@ -124,3 +226,115 @@ class PackageManagerMixins(BasePackageManagerMixins):
 
 class PackageManager(PackageManagerMixins, BasePackageManager):
     pass
+
+
+def get_imports_graph(package_manager, exclude=()):
+    """Module-level internal imports of each module.
+
+    Returns:
+        dict: module name -> imported modules names (ordered, no repetitions).
+    """
+    exclude = set(exclude)
+
+    graph = {}
+    for package in package_manager.packages_ls:
+        for module in package.modules_ls:
+            if module.long_name in exclude:
+                continue
+
+            imports = module.get_module_level_internal_imports(package.modules_trie)
+            graph[module.long_name] = [import_ for import_ in dict.fromkeys(imports)
+                                       if import_ not in exclude]
+
+    return graph
+
+
+def find_strongly_connected_components(graph):
+    """Tarjan's algorithm (iterative, so deep graphs do not hit the recursion limit).
+
+    Args:
+        graph (dict): node -> adjacent nodes. Nodes that are only adjacent
+            are also considered.
+
+    Returns:
+        list[list]: components in reverse topological order (each component
+            comes after the ones it points to).
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    def _push(node):
+        index[node] = lowlink[node] = len(index)
+        stack.append(node)
+        on_stack.add(node)
+        return node, iter(graph.get(node, ()))
+
+    for root in graph:
+        if root in index:
+            continue
+
+        work = [_push(root)]
+        while work:
+            node, adjacent = work[-1]
+            for other in adjacent:
+                if other not in index:
+                    work.append(_push(other))
+                    break
+
+                if other in on_stack:
+                    lowlink[node] = min(lowlink[node], index[other])
+
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        other = stack.pop()
+                        on_stack.discard(other)
+                        component.append(other)
+                        if other == node:
+                            break
+
+                    components.append(component)
+
+    return components
+
+
+def find_cycles(graph, components=None):
+    """Strongly connected components with more than one node or a self-import.
+    """
+    if components is None:
+        components = find_strongly_connected_components(graph)
+
+    return [component for component in components
+            if len(component) > 1 or component[0] in graph.get(component[0], ())]
+
+
+def condense_graph(graph, components):
+    """Graph of the components (a DAG).
+
+    Returns:
+        dict: component index -> indices of the components it points to.
+    """
+    component_index = {node: index for index, component in enumerate(components)
+                       for node in component}
+
+    condensed = {}
+    for index, component in enumerate(components):
+        adjacent = {}
+        for node in component:
+            for other in graph.get(node, ()):
+                other_index = component_index[other]
+                if other_index != index:
+                    adjacent[other_index] = None
+
+        condensed[index] = list(adjacent)
+
+    return condensed
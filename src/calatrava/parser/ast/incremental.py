@@ -0,0 +1,395 @@
+"""Incremental re-analysis of packages.
+
+The state of a run (facts of the parsed modules and the resolution of each
+base) is stored to be reused in the next run. Only the modules whose
+content changed are parsed again, and only the resolutions depending on
+changed, added or removed modules are redone. The remaining resolutions
+are replayed in the same order, leading to the same result as a full run.
+
+Modules of installed packages (see `external`) are not stored (their facts
+are in the parse cache), but their stats and the names looked up in them
+are, to redo the resolutions depending on them when they change.
+"""
+
+from collections import defaultdict
+from collections import namedtuple
+import os
+from pathlib import Path
+import pickle
+import sys
+
+import calatrava
+from calatrava.cache import hash_bytes
+from calatrava.cache import hash_file
+from calatrava.parser.ast.facts import FACTS_VERSION
+
+
+# deps: ('module', long_name) for consulted modules and
+# ('lookup', long_name) for names looked up in packages
+Resolution = namedtuple('Resolution', ['target', 'created', 'deps'])
+
+ModuleEntry = namedtuple('ModuleEntry', ['long_name', 'mtime_ns', 'size', 'hash', 'facts'])
+
+ExternalModuleEntry = namedtuple('ExternalModuleEntry', ['path', 'mtime_ns', 'size', 'hash'])
+
+# bumped when the stored data changes
+VERSION = 2
+
+
+def _get_target(base):
+    if base.module is None:
+        return ('unknown', base.long_name)
+
+    kind = 'class' if base.found else 'dummy'
+    return (kind, base.module.long_name, base.name)
+
+
+def _get_prefixes(long_name):
+    long_name_ls = long_name.split('.')
+    return ['.'.join(long_name_ls[:i]) for i in range(1, len(long_name_ls) + 1)]
+
+
+class ResolutionTracker:
+    """Memoizes resolutions of bases with the modules they depend on.
+
+    Dependencies are logged while resolving. As modules cache what they
+    found, the dependencies of each cached name are kept to be added to
+    the log when the cached name is used.
+    """
+
+    def __init__(self, resolutions=None):
+        self.resolutions = resolutions or {}
+        self.used = {}
+
+        self.stats = {'replayed': 0, 'resolved': 0}
+
+        self._log = []
+        self._found_deps = {}
+        self._created = None
+
+    def consult(self, module_name):
+        mark = len(self._log)
+        self._log.append(('module', module_name))
+
+        return mark
+
+    def lookup(self, long_name):
+        self._log.append(('lookup', long_name))
+
+    def add_module(self, module_name):
+        if self._created is not None:
+            self._created.append(module_name)
+
+    def add_found(self, module_name, name, mark):
+        self._found_deps[(module_name, name)] = frozenset(self._log[mark:])
+
+    def use_found(self, module_name, name):
+        self._log.extend(self._found_deps.get((module_name, name), ()))
+
+    def resolve(self, module, tmp_base):
+        key = (module.long_name, *tmp_base)
+
+        resolution = self.resolutions.get(key, None)
+        base = None
+        if resolution is not None:
+            base = self._replay(module, tmp_base, resolution)
+
+        if base is not None:
+            self.stats['replayed'] += 1
+        else:
+            mark = self.consult(module.long_name)
+            self._created = []
+            try:
+                base = module.classes_visitor.find_base(tmp_base)
+            finally:
+                created, self._created = self._created, None
+
+            resolution = Resolution(_get_target(base), tuple(created),
+                                    frozenset(self._log[mark:]))
+            self.resolutions[key] = resolution
+            self.stats['resolved'] += 1
+
+        self.used[key] = resolution
+
+        return base
+
+    @staticmethod
+    def _find_module(manager, module_name):
+        package = manager._get_package(module_name)
+        if package is not None:
+            return package.find_module(module_name)
+
+    def _replay(self, module, tmp_base, resolution):
+        # None if a module is gone (resolved again)
+        manager = module.package.manager
+
+        # same modules, in the same order
+        for module_name in resolution.created:
+            if self._find_module(manager, module_name) is None:
+                return None
+
+        kind, *target = resolution.target
+        if kind in ('class', 'dummy'):
+            module_name, name = target
+            target_module = self._find_module(manager, module_name)
+            if target_module is None:
+                return None
+
+            if kind == 'class':
+                return target_module.find_class(name)
+
+            self._found_deps[(module_name, name)] = resolution.deps
+            return target_module.add_not_found(name)
+
+        # unknown classes are not always registered (e.g. extra modules)
+        return module.classes_visitor.find_base(tmp_base)
+
+
+class IncrementalState:
+    """State of a previous run, used as facts cache (as `ParseCache`).
+
+    Args:
+        key (str): identifies the run (packages, imports, visitor...).
+        cache (ParseCache): used for modules not in the state.
+    """
+
+    def __init__(self, key, cache=None):
+        self.key = key
+        self.cache = cache
+
+        self.modules = {}
+        self.modules_names = {}
+        self.resolutions = {}
+
+        # of installed packages: long name -> entry and
+        # (kind, long name) -> found for the names looked up
+        self.external_modules = {}
+        self.external_names = {}
+
+        self._new_modules = {}
+        self._valid_paths = set()
+        self._modules_by_path = {}
+        self._changed = False
+
+    @classmethod
+    def from_file(cls, path, key, cache=None):
+        state = cls(key, cache=cache)
+
+        try:
+            with open(path, 'rb') as file:
+                data = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError):
+            return state
+
+        if data.get('key', None) == key:
+            state.modules = data['modules']
+            state.modules_names = data['modules_names']
+            state.resolutions = data['resolutions']
+            state.external_modules = data['external_modules']
+            state.external_names = data['external_names']
+
+        return state
+
+    def save(self, path, package_manager):
+        tracker = package_manager.resolution_tracker
+        if (not self._changed and tracker.stats['resolved'] == 0
+                and self._new_modules.keys() == self.modules.keys()
+                and tracker.used.keys() == self.resolutions.keys()):
+            return
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        external_modules, external_names = self._get_external_data(
+            package_manager.external_resolver)
+
+        data = {
+            'key': self.key,
+            'modules': self._new_modules,
+            'modules_names': {
+                package.name: (frozenset(package.modules_names),
+                               frozenset(package.extra_modules_names))
+                for package in package_manager.packages_ls},
+            'resolutions': tracker.used,
+            'external_modules': external_modules,
+            'external_names': external_names,
+        }
+
+        tmp_path = path.with_name(f'.{path.name}.{os.getpid()}')
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _get_external_data(self, resolver):
+        modules = {}
+        names = {}
+        if resolver is None:
+            return modules, names
+
+        for name, package in resolver.packages.items():
+            names[('package', name)] = package is not None
+            if package is None:
+                continue
+
+            for kind, lazy_names in (('module', package.modules_names),
+                                     ('extra', package.extra_modules_names)):
+                for long_name, found in lazy_names.checked.items():
+                    names[(kind, long_name)] = found
+
+            for long_name in package.modules_names:
+                path = package.modules_paths[long_name]
+                stat = package.modules_stats[long_name]
+
+                entry = self.external_modules.get(long_name, None)
+                if entry is None or (entry.path, entry.mtime_ns, entry.size) != (
+                        path, stat.st_mtime_ns, stat.st_size):
+                    entry = ExternalModuleEntry(path, stat.st_mtime_ns,
+                                                stat.st_size, hash_file(path))
+                modules[long_name] = entry
+
+        return modules, names
+
+    def _apply_external(self, package_manager, changed, added_removed):
+        resolver = package_manager.external_resolver
+        if resolver is None:
+            return
+
+        for (kind, long_name), found in self.external_names.items():
+            package = resolver.find_package(long_name, package_manager)
+            if kind == 'package':
+                now_found = package is not None
+            elif kind == 'module':
+                now_found = package is not None and long_name in package.modules_names
+            else:
+                now_found = package is not None and long_name in package.extra_modules_names
+
+            if now_found != found:
+                added_removed.add(long_name)
+
+        for long_name, entry in self.external_modules.items():
+            package = resolver.find_package(long_name, package_manager)
+            if (package is None or long_name not in package.modules_names
+                    or package.modules_paths[long_name] != entry.path):
+                changed.add(long_name)
+                continue
+
+            stat = package.modules_stats[long_name]
+            if (entry.mtime_ns, entry.size) != (stat.st_mtime_ns, stat.st_size):
+                if stat.st_size != entry.size or hash_file(entry.path) != entry.hash:
+                    changed.add(long_name)
+                    continue
+
+                self.external_modules[long_name] = entry._replace(mtime_ns=stat.st_mtime_ns)
+                self._changed = True
+
+    def apply(self, package_manager):
+        """Finds changes and installs the still valid resolutions.
+
+        Returns:
+            tuple: names of changed (or removed) modules and of added or
+                removed (extra) modules.
+        """
+        changed = set()
+        added_removed = set()
+        for package in package_manager.packages_ls:
+            for long_name, path in package.modules_paths.items():
+                self._modules_by_path[path] = long_name
+
+            old_names = self.modules_names.get(package.name, None)
+            if old_names is None:
+                added_removed.add(package.name)
+                continue
+
+            old_modules_names, old_extra_modules_names = old_names
+            added_removed |= old_modules_names ^ package.modules_names
+            added_removed |= old_extra_modules_names ^ package.extra_modules_names
+
+        for path, entry in self.modules.items():
+            package = package_manager._get_package(entry.long_name)
+            if package is None or package.modules_paths.get(entry.long_name, None) != path:
+                changed.add(entry.long_name)
+                continue
+
+            stat = package.modules_stats[entry.long_name]
+            if (entry.mtime_ns, entry.size) != (stat.st_mtime_ns, stat.st_size):
+                if stat.st_size != entry.size or hash_file(path) != entry.hash:
+                    changed.add(entry.long_name)
+                    continue
+
+                self.modules[path] = entry._replace(mtime_ns=stat.st_mtime_ns)
+                self._changed = True
+
+            self._valid_paths.add(path)
+
+        self._apply_external(package_manager, changed, added_removed)
+
+        self._changed |= bool(changed or added_removed)
+
+        invalid = self._find_dependent(changed, added_removed)
+        package_manager.resolution_tracker = ResolutionTracker({
+            key: resolution for key, resolution in self.resolutions.items()
+            if key not in invalid})
+
+        return changed, added_removed
+
+    def _find_dependent(self, changed, added_removed):
+        # reverse dependencies
+        by_module = defaultdict(set)
+        by_prefix = defaultdict(set)
+        for key, resolution in self.resolutions.items():
+            for kind, long_name in resolution.deps:
+                if kind == 'module':
+                    by_module[long_name].add(key)
+                else:
+                    # outcome depends on which prefixes are modules
+                    for prefix in _get_prefixes(long_name):
+                        by_prefix[prefix].add(key)
+
+        invalid = set()
+        for long_name in changed:
+            invalid |= by_module.get(long_name, set())
+        for long_name in added_removed:
+            invalid |= by_prefix.get(long_name, set())
+
+        return invalid
+
+    def load(self, path, facts_key, stat=None):
+        if path in self._valid_paths:
+            entry = self.modules[path]
+            self._new_modules[path] = entry
+            return entry.facts
+
+        if self.cache is not None:
+            facts = self.cache.load(path, facts_key, stat=stat)
+            if facts is not None:
+                self._add_module(path, facts, stat)
+
+            return facts
+
+    def store(self, path, facts_key, facts, stat=None):
+        self._add_module(path, facts, stat)
+
+        if self.cache is not None:
+            self.cache.store(path, facts_key, facts, stat=stat)
+
+    def _add_module(self, path, facts, stat=None):
+        self._changed = True
+        if stat is None:
+            stat = os.stat(path)
+
+        self._new_modules[path] = ModuleEntry(
+            self._modules_by_path[path], stat.st_mtime_ns, stat.st_size,
+            hash_file(path), facts)
+
+
+def get_state_key(packages_paths, imports, facts_key, exclude=(), external=()):
+    return repr((
+        calatrava.__version__, sys.version, VERSION, FACTS_VERSION, facts_key,
+        [os.path.abspath(path) for path in packages_paths],
+        list(imports), sorted(exclude), sorted(external),
+    ))
+
+
+def get_state_path(cache_dir, key):
+    return Path(cache_dir).expanduser() / 'states' / f'{hash_bytes(key.encode())}.pickle'
@@ -47,13 +47,141 @@ def collect_star_imports(root, module_name, module_is_init):
             continue
 
         if node.names[0].name == '*':
-            module_name = get_import_from_module_name(
-                node, module_name, module_is_init)
-            star_imports.append(module_name)
+            star_imports.append(get_import_from_module_name(
+                node, module_name, module_is_init))
 
     return star_imports
 
 
+class SymbolTable:
+    """Module symbols and imports collected in a single traversal.
+
+    Mirrors `find_by_name`, `find_in_imports` and `collect_star_imports`
+    (first match in `ast.walk` order wins), but turns each lookup into a
+    dict access. `imported_names` keeps every import in source order (as
+    the import graph needs them).
+    """
+
+    def __init__(self, root, module_name, module_is_init=False):
+        self.class_defs = {}
+        self.imports = {}
+        self.star_imports = []
+        self.assignments = set()
+        self.imported_names = []
+
+        # None if not defined (or not a literal)
+        self.all_names = None
+
+        self._collect(root, module_name, module_is_init)
+
+    def _collect(self, root, module_name, module_is_init):
+        # depth-first (source order); as `ast.walk` is breadth-first, the
+        # shallowest binding of a name wins (the first one if same depth)
+        class_defs = {}
+        imports = {}
+        star_imports = []
+
+        n_bindings = 0
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+
+            if isinstance(node, ast.ClassDef):
+                _bind(class_defs, node.name, (depth, n_bindings, node))
+                n_bindings += 1
+
+            elif isinstance(node, ast.Import):
+                for name in node.names:
+                    self.imported_names.append(name.name)
+                    for bound_name in _get_bound_names(name):
+                        _bind(imports, bound_name, (depth, n_bindings, name.name))
+                        n_bindings += 1
+                continue
+
+            elif isinstance(node, ast.ImportFrom):
+                node_module = get_import_from_module_name(
+                    node, module_name, module_is_init)
+
+                if node.names[0].name == '*':
+                    star_imports.append((depth, n_bindings, node_module))
+
+                for name in node.names:
+                    long_name = f'{node_module}.{name.name}'
+                    self.imported_names.append(long_name)
+                    for bound_name in _get_bound_names(name):
+                        _bind(imports, bound_name, (depth, n_bindings, long_name))
+                        n_bindings += 1
+                continue
+
+            children = list(ast.iter_child_nodes(node))
+            stack.extend((child, depth + 1) for child in reversed(children))
+
+        self.class_defs = _get_walk_ordered(class_defs)
+        self.imports = _get_walk_ordered(imports)
+        self.star_imports = [node_module for *_, node_module in sorted(star_imports)]
+
+        for node in root.body:
+            if isinstance(node, ast.AugAssign):
+                if _is_all_target(node.target) and self.all_names is not None:
+                    self._extend_all_names(node.value)
+                continue
+
+            if not isinstance(node, ast.Assign):
+                continue
+
+            for target in node.targets:
+                targets = target.elts if isinstance(target, ast.Tuple) else [target]
+                self.assignments.update(
+                    target.id for target in targets if isinstance(target, ast.Name))
+
+                if _is_all_target(target):
+                    self.all_names = []
+                    self._extend_all_names(node.value)
+
+    def _extend_all_names(self, node):
+        names = _get_literal_strings(node)
+        if names is None:
+            self.all_names = None
+        else:
+            self.all_names.extend(names)
+
+
+def _get_bound_names(name):
+    # ast.alias
+    return (name.name, name.asname) if name.asname else (name.name,)
+
+
+def _bind(bindings, name, binding):
+    # binding is (depth, order, value)
+    other = bindings.get(name, None)
+    if other is None or binding[0] < other[0]:
+        bindings[name] = binding
+
+
+def _get_walk_ordered(bindings):
+    # as if inserted while walking breadth-first
+    return {name: binding[2] for name, binding in
+            sorted(bindings.items(), key=lambda item: item[1][:2])}
+
+
+def _is_all_target(node):
+    return isinstance(node, ast.Name) and node.id == '__all__'
+
+
+def _get_literal_strings(node):
+    # e.g. `__all__` values
+    if not isinstance(node, (ast.List, ast.Tuple)):
+        return None
+
+    names = []
+    for elt in node.elts:
+        if not isinstance(elt, ast.Constant) or not isinstance(elt.value, str):
+            return None
+        names.append(elt.value)
+
+    return names
+
+
 class AttributeVisitor(ast.NodeVisitor):
 
     def __init__(self):
@@ -0,0 +1,286 @@
+"""Snapshots of resolved package managers.
+
+Names are stored once in a table and referenced by index (strings in
+classes facts are shared, so they are also pickled once). Bases and
+children edges are stored as arrays of class indices (with offsets per
+class). The result is pickled and compressed.
+"""
+
+from array import array
+from pathlib import Path
+import pickle
+import zlib
+
+from calatrava.parser.ast.base import PackageScan
+from calatrava.parser.ast.external import (
+    ExternalPackage,
+    ExternalPackageScan,
+    ExternalResolver,
+)
+from calatrava.parser.ast.uml import (
+    DummyClass,
+    Package,
+    PackageManager,
+)
+
+
+MAGIC = b'CALATRAVA-UML'
+VERSION = 2
+
+
+class StringTable:
+
+    def __init__(self, strings=()):
+        self.strings = list(strings)
+        self._indices = {string: index for index, string in enumerate(self.strings)}
+
+    def add(self, string):
+        index = self._indices.get(string, None)
+        if index is None:
+            index = self._indices[string] = len(self.strings)
+            self.strings.append(string)
+
+        return index
+
+    def add_all(self, strings):
+        return array('I', [self.add(string) for string in strings])
+
+    def get_all(self, indices):
+        return [self.strings[index] for index in indices]
+
+    def intern(self, obj):
+        # same string objects are pickled once
+        if isinstance(obj, str):
+            return self.strings[self.add(obj)]
+        elif isinstance(obj, dict):
+            return {key: self.intern(value) for key, value in obj.items()}
+
+        return [self.intern(value) for value in obj]
+
+
+def _get_edges(classes, indices, attr_name):
+    # compressed sparse rows
+    offsets = array('I', [0])
+    targets = array('I')
+    for class_ in classes:
+        targets.extend(indices[id(other)] for other in getattr(class_, attr_name))
+        offsets.append(len(targets))
+
+    return offsets, targets
+
+
+def _set_edges(classes, offsets, targets, attr_name):
+    for index, class_ in enumerate(classes):
+        setattr(class_, attr_name, [classes[target] for target in
+                                    targets[offsets[index]:offsets[index + 1]]])
+
+
+def _collect_classes(package_manager, modules):
+    # defined classes first (in the order they were added), then dummies
+    classes = [class_ for module in modules for class_ in module.classes_ls]
+    indices = {id(class_): index for index, class_ in enumerate(classes)}
+
+    stack = list(package_manager._unknown_classes.values())
+    stack.extend(class_ for module in modules for class_ in module.not_found.values())
+    stack.extend(classes)
+    while stack:
+        class_ = stack.pop()
+        if id(class_) not in indices:
+            indices[id(class_)] = len(classes)
+            classes.append(class_)
+
+        for other in class_.bases + class_.children:
+            if id(other) not in indices:
+                stack.append(other)
+
+    return classes, indices
+
+
+def _get_external_data(external_resolver, strings):
+    # only what was looked up (the resolver finds the rest again on demand)
+    if external_resolver is None:
+        return None
+
+    packages = []
+    for package in external_resolver.packages_ls:
+        packages.append({
+            'name': strings.add(package.name),
+            'bases': strings.add_all(str(base) for base in package.bases),
+            'modules_paths': {strings.add(name): strings.add(module_path)
+                              for name, module_path in package.modules_paths.items()},
+            'init_modules_names': strings.add_all(sorted(package.init_modules_names)),
+            'extra_modules_names': strings.add_all(sorted(package.extra_modules_names)),
+            'modules': strings.add_all(module.long_name for module in package.modules_ls),
+        })
+
+    return {
+        'patterns': list(external_resolver.patterns),
+        'classes_visitor': external_resolver.classes_visitor,
+        'packages': packages,
+    }
+
+
+def _load_external_resolver(external_data, strings):
+    if external_data is None:
+        return None
+
+    # parsed facts are not cached (as when no cache is given)
+    external_resolver = ExternalResolver(
+        external_data['patterns'],
+        classes_visitor=external_data['classes_visitor'])
+
+    for package_data in external_data['packages']:
+        name = strings.strings[package_data['name']]
+        bases = [Path(base) for base in strings.get_all(package_data['bases'])]
+
+        scan = ExternalPackageScan(name, bases)
+        scan.restore(
+            {strings.strings[name]: strings.strings[module_path]
+             for name, module_path in package_data['modules_paths'].items()},
+            init_modules_names=strings.get_all(package_data['init_modules_names']),
+            extra_modules_names=strings.get_all(package_data['extra_modules_names']))
+
+        external_resolver.packages[name] = ExternalPackage(
+            name, bases, scan=scan, classes_visitor=external_resolver.classes_visitor,
+            keep_ast=False)
+
+    return external_resolver
+
+
+def save_snapshot(package_manager, path):
+    strings = StringTable()
+
+    external_resolver = package_manager.external_resolver
+    all_packages = list(package_manager.packages_ls)
+    if external_resolver is not None:
+        all_packages.extend(external_resolver.packages_ls)
+
+    modules = [module for package in all_packages for module in package.modules_ls]
+    modules_indices = {id(module): index for index, module in enumerate(modules)}
+
+    for package in all_packages:
+        if package.facts_key is None:
+            raise Exception(f"Cannot save package `{package.name}` with custom visitor")
+
+    packages = []
+    for package in package_manager.packages_ls:
+
+        packages.append({
+            'path': strings.add(str(package.path)),
+            'classes_visitor': package.facts_key,
+            'exclude': list(package.exclude),
+            'modules_names': strings.add_all(sorted(package.modules_names)),
+            'extra_modules_names': strings.add_all(sorted(package.extra_modules_names)),
+            'subpackages_names': strings.add_all(sorted(package.subpackages_names)),
+            'init_modules_names': strings.add_all(sorted(package.init_modules_names)),
+            'modules_paths': {strings.add(name): strings.add(module_path)
+                              for name, module_path in package.modules_paths.items()},
+            'modules': strings.add_all(module.long_name for module in package.modules_ls),
+        })
+
+    classes, indices = _collect_classes(package_manager, modules)
+
+    # found classes are stored as facts (without bases)
+    classes_modules = array('i')
+    classes_data = []
+    for class_ in classes:
+        if class_.module is None:
+            classes_modules.append(-1)
+        else:
+            classes_modules.append(modules_indices[id(class_.module)])
+
+        if class_.found:
+            class_facts = class_.get_facts()
+            del class_facts['tmp_bases']
+            classes_data.append(strings.intern(class_facts))
+        else:
+            classes_data.append(strings.add(class_.name))
+
+    data = {
+        'version': VERSION,
+        'jobs': package_manager.jobs,
+        'packages': packages,
+        'external': _get_external_data(external_resolver, strings),
+        'found': array('b', [class_.found for class_ in classes]),
+        'modules': classes_modules,
+        'classes': classes_data,
+        'bases': _get_edges(classes, indices, 'bases'),
+        'children': _get_edges(classes, indices, 'children'),
+        'not_found': [
+            [(strings.add(name), indices[id(class_)])
+             for name, class_ in module.not_found.items()]
+            for module in modules],
+        'unknown_classes': [
+            (strings.add(long_name), indices[id(class_)])
+            for long_name, class_ in package_manager._unknown_classes.items()],
+        'strings': strings.strings,
+    }
+
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)))
+
+
+def load_snapshot(path, PackageManager=PackageManager):
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise Exception(f"`{path}` is not a calatrava snapshot")
+        data = pickle.loads(zlib.decompress(file.read()))
+
+    if data['version'] != VERSION:
+        raise Exception(f"Unsupported snapshot version `{data['version']}`")
+
+    strings = StringTable(data['strings'])
+
+    # packages are not scanned again
+    packages = []
+    modules = []
+    for package_data in data['packages']:
+        scan = PackageScan()
+        scan.modules_names = set(strings.get_all(package_data['modules_names']))
+        scan.extra_modules_names = set(strings.get_all(package_data['extra_modules_names']))
+        scan.subpackages_names = set(strings.get_all(package_data['subpackages_names']))
+        scan.init_modules_names = set(strings.get_all(package_data['init_modules_names']))
+        scan.modules_paths = {strings.strings[name]: strings.strings[module_path]
+                              for name, module_path in package_data['modules_paths'].items()}
+
+        package = Package(strings.strings[package_data['path']],
+                          classes_visitor=package_data['classes_visitor'],
+                          jobs=data['jobs'], keep_ast=False,
+                          exclude=tuple(package_data['exclude']), scan=scan)
+        packages.append(package)
+
+    external_resolver = _load_external_resolver(data['external'], strings)
+    package_manager = PackageManager(packages, jobs=data['jobs'],
+                                     external_resolver=external_resolver)
+
+    packages_data = list(zip(packages, data['packages']))
+    if external_resolver is not None:
+        packages_data.extend(zip(external_resolver.packages_ls,
+                                 data['external']['packages']))
+
+    for package, package_data in packages_data:
+        package.manager = package_manager
+        modules.extend(package.find_module(module_name)
+                       for module_name in strings.get_all(package_data['modules']))
+
+    classes = []
+    for found, module_index, class_data in zip(data['found'], data['modules'], data['classes']):
+        module = None if module_index == -1 else modules[module_index]
+        if found:
+            class_data['tmp_bases'] = []
+            classes.append(module.classes_visitor.load_class(class_data))
+        else:
+            classes.append(DummyClass(strings.strings[class_data], module))
+
+    _set_edges(classes, *data['bases'], 'bases')
+    _set_edges(classes, *data['children'], 'children')
+
+    for module, not_found in zip(modules, data['not_found']):
+        for name, index in not_found:
+            module.not_found[strings.strings[name]] = classes[index]
+
+    for long_name, index in data['unknown_classes']:
+        package_manager._unknown_classes[strings.strings[long_name]] = classes[index]
+
+    return package_manager
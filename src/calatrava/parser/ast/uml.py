@@ -5,23 +5,33 @@ from abc import (
 )
 
 import ast
-from collections import namedtuple
+from collections import (
+    Counter,
+    deque,
+    namedtuple,
+)
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import os
+import sys
+import time
 
 from calatrava.parser.ast.node_visitors import (
-    find_by_name,
-    find_in_imports,
-    collect_star_imports,
     collect_attr_long_name,
     BaseAssignCollector,
 )
 from calatrava.parser.ast.base import (
+    load_root,
     BaseModule,
-    BaseModuleMixins,
     BasePackage,
     BasePackageMixins,
     BasePackageManager,
     BasePackageManagerMixins,
 )
+from calatrava.parser.ast.facts import (
+    FactsModuleMixins,
+    extract_module_facts,
+)
 
 
 PYTHON_PROTECTED_CLASSES = {
@@ -31,15 +41,216 @@ PYTHON_PROTECTED_CLASSES = {
 }
 
 
-class ModuleMixins(BaseModuleMixins):
+def _extract_module_facts_from_path(path, long_name, is_init, classes_visitor):
+    # runs in worker processes (visitor given by type, as it is not picklable)
+    return extract_module_facts(load_root(path), long_name, is_init,
+                                _get_worker_classes_visitor(classes_visitor))
+
+
+def _get_n_jobs(jobs):
+    if jobs is None:
+        return 1
+
+    return os.cpu_count() if jobs < 0 else max(jobs, 1)
+
+
+def load_modules_facts(modules, jobs=1, executor=None):
+    """Loads facts of modules, parsing the ones not cached in parallel.
+
+    Args:
+        executor (ProcessPoolExecutor): reused if given (otherwise one is
+            created for this call).
+    """
+    modules = [module for module in modules if not module.has_facts]
+
+    n_jobs = _get_n_jobs(jobs)
+    if n_jobs > 1:
+        modules = [module for module in modules if not module.load_cached_facts()]
+
+    parallel_modules = [module for module in modules
+                        if module.package.facts_key is not None]
+    if n_jobs == 1 or len(parallel_modules) < 2:
+        for module in modules:
+            module.facts
+
+        return
+
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(parallel_modules))) as executor:
+            _map_modules_facts(executor, parallel_modules, n_jobs)
+    else:
+        _map_modules_facts(executor, parallel_modules, n_jobs)
+
+    for module in modules:
+        module.facts
+
+
+def _map_modules_facts(executor, modules, n_jobs):
+    all_facts = executor.map(
+        _extract_module_facts_from_path,
+        [module.path for module in modules],
+        [module.long_name for module in modules],
+        [module.is_init for module in modules],
+        [module.package.facts_key for module in modules],
+        chunksize=max(1, len(modules) // (4 * n_jobs)),
+    )
+    for module, facts in zip(modules, all_facts):
+        module.set_facts(facts)
+
+
+class ExportedNames:
+    """Names bound by star imports, mapped to the module that binds them.
+
+    Star sources that cannot be inspected (extra modules, e.g. extensions)
+    bind any other name allowed by the `__all__`/privacy filters on the
+    way (kept as fallbacks).
+
+    Args:
+        modules (iterable[str]): modules in the star imports closure.
+        star_imports (iterable[str]): star imports in the closure.
+    """
+
+    def __init__(self, names=None, fallbacks=(), modules=(), star_imports=()):
+        self.names = names or {}
+        self.fallbacks = list(fallbacks)
+
+        # dicts as ordered sets
+        self.modules = dict.fromkeys(modules)
+        self.star_imports = dict.fromkeys(star_imports)
+
+    def get(self, name):
+        binding = self.names.get(name, None)
+        if binding is not None or not self.fallbacks:
+            return binding
+
+        for module_name, allowed, public_only in self.fallbacks:
+            if allowed is not None and name not in allowed:
+                continue
+            if public_only and name.startswith('_'):
+                continue
+
+            return module_name
+
+    def update(self, other):
+        # first binding wins (as star imports are tried in order)
+        for name, module_name in other.names.items():
+            self.names.setdefault(name, module_name)
+
+        self.fallbacks.extend(other.fallbacks)
+        self.modules.update(other.modules)
+        self.star_imports.update(other.star_imports)
+
+    def filter(self, all_names=None):
+        # what `from <module> import *` gets
+        if all_names is not None:
+            allowed = set(all_names)
+            names = {name: module_name for name, module_name in self.names.items()
+                     if name in allowed}
+            fallbacks = [
+                (module_name, allowed if allowed_ is None else allowed & allowed_,
+                 public_only)
+                for module_name, allowed_, public_only in self.fallbacks]
+        else:
+            names = {name: module_name for name, module_name in self.names.items()
+                     if not name.startswith('_')}
+            fallbacks = [(module_name, allowed_, True)
+                         for module_name, allowed_, _ in self.fallbacks]
+
+        return ExportedNames(names, fallbacks, self.modules, self.star_imports)
+
+
+def _get_own_names(module):
+    names = dict.fromkeys(module.facts.get_bound_names(), module.long_name)
+    return ExportedNames(names, modules=[module.long_name])
+
+
+def _get_star_sources(module):
+    manager = module.package.manager
+    return [(star_import, manager.find_star_source(star_import))
+            for star_import in module.facts.star_imports]
+
+
+def _merge_star_sources(sources):
+    star_names = ExportedNames()
+    for star_import, source in sources:
+        star_names.star_imports[star_import] = None
+
+        if isinstance(source, str):  # not inspectable
+            star_names.fallbacks.append((source, None, False))
+        elif source is not None:
+            exported_names = source._exported_names
+            if exported_names is None:
+                # in a cycle of star imports: only names bound in the source
+                exported_names = _get_own_names(source).filter(source.facts.all_names)
+
+            star_names.update(exported_names)
+
+    return star_names
+
+
+def compute_exported_names(module):
+    """Computes the star imports closure of `module` (and of the modules in it).
+
+    Iterative post-order, so long chains do not hit recursion limits.
+    Modules in cycles of star imports only see what the others bind
+    themselves.
+    """
+    stack = [(module, _get_star_sources(module))]
+    in_progress = {module}
+    while stack:
+        current, sources = stack[-1]
+        for _, source in sources:
+            if (not isinstance(source, str) and source is not None
+                    and source._exported_names is None and source not in in_progress):
+                in_progress.add(source)
+                stack.append((source, _get_star_sources(source)))
+                break
+        else:
+            stack.pop()
+            in_progress.discard(current)
+
+            star_names = _merge_star_sources(sources)
+
+            exported_names = _get_own_names(current)
+            exported_names.update(star_names)
+
+            current._star_names = star_names
+            current._exported_names = exported_names.filter(current.facts.all_names)
+
+    return module._exported_names
+
+
+class ModuleMixins(FactsModuleMixins):
 
     def __init__(self, ClassesVisitor, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.ClassesVisitor = ClassesVisitor
         self.classes_visitor = ClassesVisitor(self)
 
         self.import_class_map = {}
         self.not_found = {}
-        self.not_found_trial = {}
+
+        self._classes = {}
+        self._classes_by_name = {}
+
+        self._star_names = None
+        self._exported_names = None
+
+    @property
+    def star_names(self):
+        # names bound by the star imports of the module
+        if self._star_names is None:
+            compute_exported_names(self)
+
+        return self._star_names
+
+    @property
+    def exported_names(self):
+        # names bound by `from <module> import *`
+        if self._exported_names is None:
+            compute_exported_names(self)
+
+        return self._exported_names
 
     @property
     def classes_ls(self):
@@ -47,23 +258,50 @@ class ModuleMixins(BaseModuleMixins):
 
     @property
     def classes(self):
-        return {class_.long_name: class_ for class_ in self.classes_ls}
+        return self._classes
+
+    def add_class(self, class_):
+        # called by the classes visitor
+        self._classes[class_.long_name] = class_
+        self._classes_by_name[class_.name] = class_
+
+        if class_.get_tmp_bases():
+            self.package.manager.add_pending_class(class_)
+
+    def _get_already_found(self, name):
+        # same precedence as when merging the dicts
+        for found in (self.not_found, self.import_class_map,
+                      self._classes_by_name):
+            class_ = found.get(name, None)
+            if class_ is not None:
+                return class_
+
+    def add_not_found(self, name):
+        class_ = self.not_found.get(name, None)
+        if class_ is None:
+            class_ = DummyClass(name, self)
 
-    @property
-    def _already_found(self):
-        classes_ = {class_.name: class_ for class_ in self.classes_ls}
-        return classes_ | self.import_class_map | self.not_found | self.not_found_trial
+            manager = self.package.manager
+            manager.add_unknown_class(class_)
+            self.not_found[name] = class_
 
-    def find_class(self, name, visited=()):
-        # TODO: try to recode with pipeline? (specially to e.g. avoid checking stars)
+            negative_cache = getattr(manager, 'negative_cache', None)
+            if negative_cache is not None and manager.resolution_tracker is None:
+                negative_cache.add(self.long_name, name, class_)
 
-        # visited only for possible recursion due to star imports
-        if self in visited:
-            return
+        return class_
+
+    def find_class(self, name):
+        # dependencies of resolutions are tracked in incremental mode
+        tracker = self.package.manager.resolution_tracker
+        if tracker is not None:
+            mark = tracker.consult(self.long_name)
 
         # try in already found
-        class_ = self._already_found.get(name, None)
+        class_ = self._get_already_found(name)
         if class_ is not None:
+            if tracker is not None:
+                tracker.use_found(self.long_name, name)
             return class_
 
         # try in python protected names
@@ -71,47 +309,47 @@ class ModuleMixins(BaseModuleMixins):
             return self.package.manager.find_class(name)
 
         # try in definitions
-        node = find_by_name(self.root, ast.ClassDef, name)
-        if node is not None:
-            return self.classes_visitor.visit(node)
+        record = self.facts.find_class_record(name)
+        if record is not None:
+            return self.classes_visitor.load(record)
 
         # try in imports
-        long_name = find_in_imports(
-            self.root, name, self.long_name, self.is_init)
+        long_name = self.facts.find_import(name)
         if long_name is not None:
             class_ = self.package.manager.find_class(long_name)
             self.import_class_map[name] = class_
+            if tracker is not None:
+                tracker.add_found(self.long_name, name, mark)
             return class_
 
-        # try in start imports
-        star_imports = collect_star_imports(self.root, self.long_name,
-                                            self.is_init)
-        if star_imports:
-            if visited:
-                visited.append(self)
-            else:
-                visited = [self]
-
-            for star_import in star_imports:
-                long_name = f'{star_import}.{name}'
-                class_ = self.package.manager.find_class(
-                    long_name, visited=visited)
-                if class_ is not None:
-                    self.import_class_map[name] = class_
-                    return class_
-
-        if not visited or (len(visited) == 1 and self in visited):
-            # not found (e.g. assignment)
-            class_ = DummyClass(name, self)
-
-            self.package.manager.add_unknown_class(class_)
-            self.not_found[name] = class_
+        # try in star imports (closure computed once)
+        if self.facts.star_imports:
+            star_names = self.star_names
+            if tracker is not None:
+                for module_name in star_names.modules:
+                    tracker.consult(module_name)
+                for star_import in star_names.star_imports:
+                    tracker.lookup(star_import)
+
+            # bound here (in a cycle of star imports) but not as a class
+            module_name = star_names.get(name)
+            if module_name is not None and module_name != self.long_name:
+                class_ = self.package.manager.find_class(f'{module_name}.{name}')
+                self.import_class_map[name] = class_
+                if tracker is not None:
+                    tracker.add_found(self.long_name, name, mark)
+                return class_
+
+        # not found (e.g. assignment)
+        class_ = self.add_not_found(name)
+        if tracker is not None:
+            tracker.add_found(self.long_name, name, mark)
 
-            return class_
+        return class_
 
     def find_all_classes(self):
-        class_nodes = [node for node in self.root.body if isinstance(node, ast.ClassDef)]
-        return [self.classes_visitor.visit(node) for node in class_nodes]
+        return [self.classes_visitor.load(record)
+                for record in self.facts.get_top_level_records()]
 
     def update_inheritance(self):
         return self.classes_visitor.update_inheritance()
@@ -123,9 +361,77 @@ class Module(ModuleMixins, BaseModule):
                          ClassesVisitor=ClassesVisitor)
 
 
-class PackageMixins(BasePackageMixins):
+class InheritanceWorklistMixins(metaclass=ABCMeta):
+    # classes are queued when created and their bases resolved once
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending_classes = deque()
+
+        # memoizes resolutions (see `incremental`)
+        self.resolution_tracker = None
+
+        self.stats = {
+            'resolution_steps': 0,
+            'resolution_time': 0.,
+        }
+
+    @property
+    def n_pending_classes(self):
+        return len(self._pending_classes)
+
+    def add_pending_class(self, class_):
+        self._pending_classes.append(class_)
+
+    def resolve_base(self, module, tmp_base):
+        if self.resolution_tracker is not None:
+            return self.resolution_tracker.resolve(module, tmp_base)
+
+        return module.classes_visitor.find_base(tmp_base)
+
+    def update_inheritance(self):
+        # resolution may create classes, which are appended to the queue
+        start = time.perf_counter()
+
+        pending_classes = self._pending_classes
+        while pending_classes:
+            class_ = pending_classes.popleft()
+            class_.module.classes_visitor.resolve_bases(class_)
+
+            self.stats['resolution_steps'] += 1
+
+        self.stats['resolution_time'] += time.perf_counter() - start
+
+
+class PackageMixins(InheritanceWorklistMixins, BasePackageMixins):
+    # the worklist is only used if the package is its own manager: inside
+    # a manager, classes are queued in the manager
+
+    @property
+    def n_pending_classes(self):
+        if self.manager is not self:
+            return self.manager.n_pending_classes
+
+        return super().n_pending_classes
+
+    def update_inheritance(self):
+        if self.manager is not self:
+            return self.manager.update_inheritance()
+
+        return super().update_inheritance()
+
+    def add_module(self, module):
+        super().add_module(module)
+
+        tracker = self.manager.resolution_tracker
+        if tracker is not None:
+            tracker.add_module(module.long_name)
+
+    def find_class(self, long_name):
+        tracker = self.manager.resolution_tracker
+        if tracker is not None:
+            tracker.lookup(long_name)
 
-    def find_class(self, long_name, visited=()):
         long_name_ls = long_name.split('.')
         i = 0
         while True:
@@ -142,7 +448,14 @@ class PackageMixins(BasePackageMixins):
                 return DummyClass(long_name)
 
         module = self.find_module(module_name)
-        return module.find_class(class_name, visited=visited)
+        return module.find_class(class_name)
+
+    def find_star_source(self, module_name):
+        # module, name of a not inspectable module or None
+        if module_name in self.modules_names:
+            return self.find_module(module_name)
+        elif module_name in self.extra_modules_names:
+            return module_name
 
     def find_module_classes(self, module_name):
         module = self.find_module(module_name)
@@ -150,12 +463,26 @@ class PackageMixins(BasePackageMixins):
         return module.find_all_classes()
 
     def find_modules_classes(self, module_names):
+        module_names = list(module_names)
+        if _get_n_jobs(self.jobs) > 1:
+            executor = self.manager.get_executor() if self.manager is not self else None
+            load_modules_facts([self.find_module(module_name)
+                                for module_name in module_names],
+                               jobs=self.jobs, executor=executor)
+
         all_classes = []
         for module_name in module_names:
             all_classes.extend(self.find_module_classes(module_name))
 
         return all_classes
 
+    def get_import_modules_names(self, import_):
+        # modules whose classes `find` returns (None for classes)
+        if import_ in self.subpackages_names:
+            return [module_name for module_name in self.modules_names if module_name.startswith(import_)]
+        elif import_ in self.modules_names:
+            return [import_]
+
     def find_subpackage_classes(self, subpackage_name):
         module_names = [module_name for module_name in self.modules_names if module_name.startswith(subpackage_name)]
         return self.find_modules_classes(module_names)
@@ -171,15 +498,6 @@ class PackageMixins(BasePackageMixins):
 
         return self.find_class(import_)
 
-    def update_inheritance(self):
-        done = True
-        for module in self.modules_ls:
-            done_ = module.update_inheritance()
-            if not done_:
-                done = False
-
-        return done
-
     def get_classes(self):
         classes = {}
         for module in self.modules_ls:
@@ -188,7 +506,7 @@ class PackageMixins(BasePackageMixins):
         return classes
 
 
-def _get_classes_visitor(type_):
+def get_classes_visitor(type_):
     accepted_types = [
         "basic", "basic-methods", "basic-attrs", "basic-attrs-methods",
     ]
@@ -201,7 +519,7 @@ def _get_classes_visitor(type_):
     elif type_ == "basic-methods":
 
         class _Class(ClassMethodsMixins, BasicClass):
-            pass
+            __slots__ = _get_mixins_slots(ClassMethodsMixins)
 
         class _ClassesVisitor(MethodsVisitorMixins, BasicClassesVisitor):
             def __init__(self, module, Class, Method):
@@ -212,7 +530,7 @@ def _get_classes_visitor(type_):
 
     elif type_ == "basic-attrs":
         class _Class(ClassAttrsMixins, BasicClass):
-            pass
+            __slots__ = _get_mixins_slots(ClassAttrsMixins)
 
         class _ClassesVisitor(AttrsOnlyVisitorMixins, BasicClassesVisitor):
             def __init__(self, module, Class):
@@ -222,7 +540,7 @@ def _get_classes_visitor(type_):
 
     elif type_ == "basic-attrs-methods":
         class _Class(ClassAttrsMixins, ClassMethodsMixins, BasicClass):
-            pass
+            __slots__ = _get_mixins_slots(ClassAttrsMixins, ClassMethodsMixins)
 
         class _ClassesVisitor(AttrsVisitorMixins, MethodsVisitorMixins,
                               BasicClassesVisitor):
@@ -233,39 +551,142 @@ def _get_classes_visitor(type_):
             module, Class=_Class, Method=BasicMethod)
 
 
+# visitor types are created once per worker (dispatch tables are per type)
+_get_worker_classes_visitor = functools.lru_cache(maxsize=None)(get_classes_visitor)
+
+
 class Package(PackageMixins, BasePackage):
-    def __init__(self, path, Module=Module, classes_visitor="basic", **kwargs):
+    def __init__(self, path, Module=Module, classes_visitor="basic", cache=None,
+                 jobs=1, keep_ast=True, exclude=(), scan=None, **kwargs):
+        # facts are only cached (or parsed in parallel) for known visitors
+        self.facts_key = classes_visitor if "ClassesVisitor" not in kwargs else None
+        self.cache = cache
+        self.jobs = jobs
+
+        # if False, trees are released after facts extraction
+        self.keep_ast = keep_ast
+
         if classes_visitor is not None:
-            kwargs.setdefault("ClassesVisitor", _get_classes_visitor(classes_visitor))
+            kwargs.setdefault("ClassesVisitor", get_classes_visitor(classes_visitor))
 
         Module_ = lambda long_name, package: Module(
             long_name, package, **kwargs)
 
-        super().__init__(path=path, Module=Module_)
+        super().__init__(path=path, Module=Module_, exclude=exclude, scan=scan)
 
 
-class PackageManagerMixins(BasePackageManagerMixins):
+class NegativeCache:
+    """Failed resolutions (not found classes), keyed by (module name, name).
+
+    Module name is what precedes the last dot of the looked up name. Misses
+    are the failed resolutions that were computed (i.e. added).
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, module_name, name):
+        class_ = self._entries.get((module_name, name), None)
+        if class_ is not None:
+            self.stats['hits'] += 1
+
+        return class_
+
+    def add(self, module_name, name, class_):
+        if (module_name, name) not in self._entries:
+            self.stats['misses'] += 1
+
+        self._entries[(module_name, name)] = class_
+
+    def clear(self):
+        self._entries.clear()
+
+
+class PackageManagerMixins(InheritanceWorklistMixins, BasePackageManagerMixins):
+
+    def __init__(self, *args, jobs=1, external_resolver=None, **kwargs):
+        # not used in incremental mode, where resolutions are memoized
+        # with their dependencies
+        self.negative_cache = NegativeCache()
+
+        # resolves names of installed packages (see `external`)
+        self.external_resolver = external_resolver
 
-    def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._unknown_classes = {}
+        self.jobs = jobs
+        self._executor = None
+
+    def get_executor(self):
+        # single pool for all parallel parses (see `shutdown`)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=_get_n_jobs(self.jobs))
+
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def add_package(self, package):
+        super().add_package(package)
+
+        # its names may have been looked up as unknown (or as external)
+        self.negative_cache.clear()
+        if self.external_resolver is not None:
+            self.external_resolver.packages.pop(package.name, None)
+
+    def _get_package(self, long_name, raise_=False):
+        package = super()._get_package(long_name)
+        if package is None and self.external_resolver is not None:
+            package = self.external_resolver.find_package(long_name, self)
+
+        if raise_ and package is None:
+            raise Exception(f"Cannot find package `{long_name.split('.')[0]}`")
+
+        return package
 
     def add_unknown_class(self, class_):
         self._unknown_classes[class_.long_name] = class_
 
-    def find_class(self, long_name, visited=()):
+    def find_class(self, long_name):
+        use_negative_cache = self.resolution_tracker is None
+        if use_negative_cache:
+            module_name, _, name = long_name.rpartition('.')
+            class_ = self.negative_cache.get(module_name, name)
+            if class_ is not None:
+                return class_
+
         package = self._get_package(long_name)
-        if package is None and visited:
-            return
-        elif package is None:
+        if package is None:
             class_ = self._unknown_classes.get(long_name,
                                                DummyClass(long_name))
             self.add_unknown_class(class_)
-            return class_
         else:
-            return package.find_class(long_name, visited=visited)
+            class_ = package.find_class(long_name)
+
+        if use_negative_cache and not class_.found:
+            self.negative_cache.add(module_name, name, class_)
+
+        return class_
+
+    def find_star_source(self, module_name):
+        package = self._get_package(module_name)
+        if package is not None:
+            return package.find_star_source(module_name)
 
     def find_all_classes(self):
+        if _get_n_jobs(self.jobs) > 1:
+            load_modules_facts([package.find_module(module_name)
+                                for package in self.packages_ls
+                                for module_name in package.modules_names],
+                               jobs=self.jobs, executor=self.get_executor())
+
         classes = []
         for package in self.packages_ls:
             classes.extend(package.find_all_classes())
@@ -276,26 +697,28 @@ class PackageManagerMixins(BasePackageManagerMixins):
         package = self._get_package(import_, raise_=True)
         return package.find(import_)
 
-    def update_inheritance(self):
-        while True:
-            done = True
-            for package in self.packages_ls:
-                done_ = package.update_inheritance()
-                if not done_:
-                    done = False
-
-            if done:
-                break
-
     def get_classes(self):
         classes = {}
         for package in self.packages_ls:
             classes |= package.get_classes()
 
+        if self.external_resolver is not None:
+            classes |= self.external_resolver.get_classes()
+
         classes |= self._unknown_classes
 
         return classes
 
+    def save(self, path):
+        # resolved classes graph (see `snapshot`)
+        from calatrava.parser.ast.snapshot import save_snapshot
+        save_snapshot(self, path)
+
+    @classmethod
+    def load(cls, path):
+        from calatrava.parser.ast.snapshot import load_snapshot
+        return load_snapshot(path, PackageManager=cls)
+
 
 class PackageManager(PackageManagerMixins, BasePackageManager):
     pass
@@ -304,33 +727,144 @@ class PackageManager(PackageManagerMixins, BasePackageManager):
 TmpBase = namedtuple('TmpBase', ['name', 'is_import'])
 
 
+def _merge_mros(class_, bases):
+    # C3 merge; None if hierarchy is inconsistent
+    if len(bases) == 1:
+        return [class_, *bases[0]._mro]
+
+    sequences = [base._mro for base in bases] + [tuple(bases)]
+    positions = [0] * len(sequences)
+
+    # number of sequences in which a class is not the head
+    in_tail = Counter()
+    for sequence in sequences:
+        in_tail.update(sequence[1:])
+
+    mro = [class_]
+    while True:
+        head = None
+        for sequence, position in zip(sequences, positions):
+            if position < len(sequence) and not in_tail[sequence[position]]:
+                head = sequence[position]
+                break
+
+        if head is None:
+            exhausted = all(position == len(sequence)
+                            for sequence, position in zip(sequences, positions))
+            return mro if exhausted else None
+
+        mro.append(head)
+        for index, sequence in enumerate(sequences):
+            position = positions[index]
+            if position < len(sequence) and sequence[position] is head:
+                positions[index] = position = position + 1
+                if position < len(sequence):
+                    in_tail[sequence[position]] -= 1
+
+
+def _linearize(class_):
+    # bases in cycles (e.g. badly resolved names) are ignored
+    bases = [base for base in class_.bases
+             if base is not class_ and base._mro is not None]
+
+    mro = _merge_mros(class_, bases)
+    if mro is None:
+        # fallback: depth-first, left to right, without repetitions
+        mro = list(dict.fromkeys(
+            [class_] + [ancestor for base in bases for ancestor in base._mro]))
+
+    return tuple(mro)
+
+
+def compute_mro(class_):
+    # iterative post-order, so deep hierarchies do not hit recursion limits
+    stack = [(class_, iter(class_.bases))]
+    in_progress = {class_}
+    while stack:
+        current, bases = stack[-1]
+        for base in bases:
+            if base._mro is None and base not in in_progress:
+                in_progress.add(base)
+                stack.append((base, iter(base.bases)))
+                break
+        else:
+            stack.pop()
+            in_progress.discard(current)
+            current._mro = _linearize(current)
+
+    return class_._mro
+
+
 class BaseClass(metaclass=ABCMeta):
+    # slotted (subclasses without `__slots__` get a `__dict__`)
+    __slots__ = ('name', 'module', 'children', 'bases', '_mro', '_long_name',
+                 '_id')
+
     def __init__(self, name, module):
-        self.name = name
+        self.name = sys.intern(name)
         self.module = module
 
         self.children = []
         self.bases = []
 
+        self._mro = None
+
+        self._long_name = None
+        self._id = None
+
     def __repr__(self):
         return f'<class: {self.long_name}>'
 
-    @abstractmethod
+    @property
     def long_name(self):
+        # cached, as modules names do not change
+        if self._long_name is None:
+            self._long_name = self._get_long_name()
+
+        return self._long_name
+
+    @abstractmethod
+    def _get_long_name(self):
         pass
 
     @property
     def short_name(self):
-        return self.name.split('.')[-1]
+        return self.name.rsplit('.', 1)[-1]
 
     @property
     def id(self):
-        return self.long_name.replace('.', '_')
+        if self._id is None:
+            self._id = self.long_name.replace('.', '_')
+
+        return self._id
 
     @property
     def found(self):
         return self._found
 
+    @property
+    def mro(self):
+        # C3 linearization (memoized)
+        if self._mro is None:
+            compute_mro(self)
+
+        return self._mro
+
+    def _clear_cache(self):
+        self._mro = None
+
+    def _invalidate(self):
+        # caches only exist if the mro was computed (also for ancestors),
+        # so descendants without mro can be skipped
+        stack = [self]
+        while stack:
+            class_ = stack.pop()
+            if class_._mro is None:
+                continue
+
+            class_._clear_cache()
+            stack.extend(class_.children)
+
     def add_child(self, child):
         self.children.append(child)
 
@@ -338,16 +872,22 @@ class BaseClass(metaclass=ABCMeta):
         self.bases.append(base)
         base.add_child(self)
 
+        self._invalidate()
+
 
 class DummyClass(BaseClass):
+    __slots__ = ()
+
+    _found = False
+
     def __init__(self, name, module=None):
         super().__init__(name, module)
-        self._found = False
-
-        self.is_python_type = name in PYTHON_PROTECTED_CLASSES
 
     @property
-    def long_name(self):
+    def is_python_type(self):
+        return self.name in PYTHON_PROTECTED_CLASSES
+
+    def _get_long_name(self):
         if self.module is not None:
             return f'{self.module.long_name}.{self.name}'
 
@@ -359,16 +899,16 @@ class DummyClass(BaseClass):
 
 
 class BasicClass(BaseClass):
+    __slots__ = ('_tmp_bases',)
+
+    _found = True
 
     def __init__(self, name, module):
         super().__init__(name=name, module=module)
 
         self._tmp_bases = []
 
-        self._found = True
-
-    @property
-    def long_name(self):
+    def _get_long_name(self):
         return f'{self.module.long_name}.{self.name}'
 
     @property
@@ -402,11 +942,45 @@ class BasicClass(BaseClass):
     def get_tmp_bases(self):
         return self._tmp_bases
 
+    def get_facts(self):
+        return {
+            'name': self.name,
+            'tmp_bases': [tuple(tmp_base) for tmp_base in self._tmp_bases],
+        }
+
+    def set_facts(self, facts):
+        self._tmp_bases.extend(TmpBase(*tmp_base) for tmp_base in facts['tmp_bases'])
+
     def reset_tmp_bases(self):
         self._tmp_bases = []
 
 
+# fields of statements (and of except handlers and match cases) that
+# contain statements
+STATEMENTS_FIELDS = frozenset(('body', 'orelse', 'handlers', 'finalbody', 'cases'))
+
+_statements_fields = {}
+
+
+def _get_statements_fields(node_type):
+    fields = _statements_fields.get(node_type, None)
+    if fields is None:
+        fields = _statements_fields[node_type] = tuple(
+            field for field in node_type._fields if field in STATEMENTS_FIELDS)
+
+    return fields
+
+
 class BasicClassesVisitor(ast.NodeVisitor):
+    # classes, methods and attributes are only defined in statements, so
+    # only statements are traversed (expressions are skipped)
+
+    # node type -> `visit_<node type>` (or `generic_visit`), per class
+    _visitors = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visitors = {}
 
     def __init__(self, module, Class):
         self.module = module
@@ -435,13 +1009,28 @@ class BasicClassesVisitor(ast.NodeVisitor):
         else:
             return ''
 
+    def visit(self, node):
+        node_type = type(node)
+        visitor = self._visitors.get(node_type, None)
+        if visitor is None:
+            visitor = self._visitors[node_type] = getattr(
+                type(self), f'visit_{node_type.__name__}',
+                type(self).generic_visit)
+
+        return visitor(self, node)
+
+    def generic_visit(self, node):
+        for field in _get_statements_fields(type(node)):
+            for inner_node in getattr(node, field):
+                self.visit(inner_node)
+
     def visit_ClassDef(self, node):
         class_ = self.Class(self._get_obj_name(node), self.module)
 
         class_.add_tmp_bases(node)
 
         self.stack.append(class_)
-        self.classes_ls.append(class_)
+        self._add_class(class_)
 
         for inner_node in node.body:
             self.visit(inner_node)
@@ -450,6 +1039,25 @@ class BasicClassesVisitor(ast.NodeVisitor):
 
         return class_
 
+    def load(self, classes_facts):
+        # inverse of visiting a class definition: returns outer class
+        classes = [self.load_class(class_facts) for class_facts in classes_facts]
+        return classes[0]
+
+    def load_class(self, facts):
+        class_ = self.Class(facts['name'], self.module)
+        class_.set_facts(facts)
+
+        self._add_class(class_)
+
+        return class_
+
+    def _add_class(self, class_):
+        self.classes_ls.append(class_)
+
+        if self.module is not None:
+            self.module.add_class(class_)
+
     def _get_obj_name(self, node):
         name = node.name
         prefix = self._get_prefix_from_stack()
@@ -461,115 +1069,199 @@ class BasicClassesVisitor(ast.NodeVisitor):
     def update_inheritance(self):
         done = True
         for class_ in self.classes_ls:
-            for tmp_base in class_.get_tmp_bases():
+            if class_.get_tmp_bases():
                 done = False
-                if tmp_base.is_import:
-                    # complete import if import from
-                    name_ls = tmp_base.name.split('.')
-                    prefix = find_in_imports(
-                        self.module.root, name_ls[0], self.module.long_name,
-                        self.module.is_init)
-                    name = f"{prefix}.{'.'.join(name_ls[1:])}"
+                self.resolve_bases(class_)
+
+        return done
 
-                    base = self.module.package.manager.find_class(name)
-                else:
-                    base = self.module.find_class(tmp_base.name)
+    def resolve_bases(self, class_):
+        manager = self.module.package.manager
+        for tmp_base in class_.get_tmp_bases():
+            class_.add_base(manager.resolve_base(self.module, tmp_base))
 
-                class_.add_base(base)
+        class_.reset_tmp_bases()
 
-            class_.reset_tmp_bases()
+    def find_base(self, tmp_base):
+        if tmp_base.is_import:
+            # complete import if import from
+            name_ls = tmp_base.name.split('.')
+            prefix = self.module.facts.find_import(name_ls[0])
+            name = f"{prefix}.{'.'.join(name_ls[1:])}"
 
-        return done
+            return self.module.package.manager.find_class(name)
+
+        return self.module.find_class(tmp_base.name)
 
 
 class ClassMixins(metaclass=ABCMeta):
-    pass
+    # slots are declared by the composed class (from `_slots` of each
+    # mixin), as bases with non-empty `__slots__` cannot be combined
+    __slots__ = ()
+    _slots = ()
+
+
+def _get_mixins_slots(*Mixins):
+    return tuple(slot for Mixin in Mixins for slot in Mixin._slots)
 
 
 class ClassMethodsMixins(ClassMixins):
+    __slots__ = ()
+    _slots = ('methods', '_all_methods', '_base_methods')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.methods = []
 
+        self._all_methods = None
+        self._base_methods = None
+
+    def _clear_cache(self):
+        super()._clear_cache()
+        self._all_methods = None
+        self._base_methods = None
+
     @property
     def all_methods(self):
-        return self.methods + self.base_methods
+        if self._all_methods is None:
+            self._all_methods = self.methods + self.base_methods
+
+        return self._all_methods
 
     @property
     def base_methods(self):
-        methods = []
-        for base in self.bases:
-            if base.found:
-                methods.extend(base.all_methods)
-        return methods
+        # in mro order
+        if self._base_methods is None:
+            self._base_methods = [method for base in self.mro[1:] if base.found
+                                  for method in base.methods]
+
+        return self._base_methods
 
     def add_method(self, method):
         self.methods.append(method)
+        self._invalidate()
+
+    def get_facts(self):
+        facts = super().get_facts()
+        facts['methods'] = [method.get_facts() for method in self.methods]
+        return facts
 
 
 class ClassAttrsMixins(ClassMixins):
+    __slots__ = ()
+    _slots = ('attrs', 'cls_attrs', '_all_attrs', '_base_attrs')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.attrs = []
         self.cls_attrs = []
 
+        self._all_attrs = None
+        self._base_attrs = None
+
+    def _clear_cache(self):
+        super()._clear_cache()
+        self._all_attrs = None
+        self._base_attrs = None
+
     @property
     def all_attrs(self):
-        return self.attrs + self.base_attrs
+        if self._all_attrs is None:
+            self._all_attrs = self.attrs + self.base_attrs
+
+        return self._all_attrs
 
     @property
     def base_attrs(self):
-        attrs = []
-        for base in self.bases:
-            if not base.found:
-                continue
+        # in mro order
+        if self._base_attrs is None:
+            self._base_attrs = [attr for base in self.mro[1:] if base.found
+                                for attr in base.attrs]
 
-            attrs.extend(base.all_attrs)
-
-        return attrs
+        return self._base_attrs
 
     def add_attr(self, attr_name):
-        self.attrs.append(attr_name)
+        self.attrs.append(sys.intern(attr_name))
+        self._invalidate()
 
     def add_cls_attr(self, var_name):
-        self.cls_attrs.append(var_name)
+        self.cls_attrs.append(sys.intern(var_name))
+
+    def get_facts(self):
+        facts = super().get_facts()
+        facts['attrs'] = self.attrs.copy()
+        facts['cls_attrs'] = self.cls_attrs.copy()
+        return facts
+
+    def set_facts(self, facts):
+        super().set_facts(facts)
+        self.attrs.extend(map(sys.intern, facts['attrs']))
+        self.cls_attrs.extend(map(sys.intern, facts['cls_attrs']))
+
+
+# decorators flags (bit fields)
+PROPERTY = 1
+CLASSMETHOD = 2
+STATICMETHOD = 4
+ABSTRACTMETHOD = 8
+SETTER = 16
+
+DECORATORS_FLAGS = {
+    'property': PROPERTY,
+    'classmethod': CLASSMETHOD,
+    'staticmethod': STATICMETHOD,
+    'abstractmethod': ABSTRACTMETHOD,
+    'abc.abstractmethod': ABSTRACTMETHOD,
+}
 
 
 class BasicMethod:
+    __slots__ = ('class_', 'name', 'short_name', 'args', 'decorators', 'flags')
 
     def __init__(self, name, class_):
         self.class_ = class_
         class_.add_method(self)
 
-        self.name = name
-        self.args_list = []
-        self.decorator_list = []
+        self.name = sys.intern(name)
+        self.short_name = sys.intern(name.split('.', 1)[1] if '.' in name else '')
+
+        # tuples (empty ones are shared)
+        self.args = ()
+        self.decorators = ()
+        self.flags = 0
 
     @property
     def long_name(self):
         return f'{self.class_.module.long_name}.{self.name}'
 
+    # read-only (tuples): decorators are added with `add_decorators_names`
     @property
-    def short_name(self):
-        return '.'.join(self.name.split('.')[1:])
+    def args_list(self):
+        return self.args
+
+    @property
+    def decorator_list(self):
+        return self.decorators
 
     @property
     def is_property(self):
-        return 'property' in self.decorator_list
+        return bool(self.flags & PROPERTY)
 
     @property
     def is_classmethod(self):
-        return 'classmethod' in self.decorator_list
+        return bool(self.flags & CLASSMETHOD)
+
+    @property
+    def is_staticmethod(self):
+        return bool(self.flags & STATICMETHOD)
 
     @property
     def is_abstractmethod(self):
-        return 'abstractmethod' in self.decorator_list or 'abc.abstractmethod' in self.decorator_list
+        return bool(self.flags & ABSTRACTMETHOD)
 
     @property
     def is_setter(self):
-        return f"{self.short_name}.setter" in self.decorator_list
+        return bool(self.flags & SETTER)
 
     @property
     def is_private(self):
@@ -595,16 +1287,45 @@ class BasicMethod:
         return f'<{type_}: {self.short_name}>'
 
     def add_args(self, args):
-        for arg in args.args:
-            self.args_list.append(arg.arg)
+        self.args += tuple(sys.intern(arg.arg) for arg in args.args)
+
+    def get_facts(self):
+        return {
+            'name': self.name,
+            'args_list': list(self.args),
+            'decorator_list': list(self.decorators),
+        }
+
+    @classmethod
+    def from_facts(cls, facts, class_):
+        method = cls(facts['name'], class_)
+        method.args = tuple(map(sys.intern, facts['args_list']))
+        method.add_decorators_names(facts['decorator_list'])
+
+        return method
+
+    def add_decorators_names(self, names):
+        if not names:
+            return
+
+        setter_name = f"{self.short_name}.setter"
+        for name in names:
+            self.flags |= DECORATORS_FLAGS.get(name, 0)
+            if name == setter_name:
+                self.flags |= SETTER
+
+        self.decorators += tuple(map(sys.intern, names))
 
     def add_decorators(self, decorator_list):
+        names = []
         for node in decorator_list:
             if isinstance(node, ast.Name):
                 name = node.id
             else:  # ast.Attribute
                 name = collect_attr_long_name(node)
-            self.decorator_list.append(name)
+            names.append(name)
+
+        self.add_decorators_names(names)
 
 
 class ClassesVisitorMixins(metaclass=ABCMeta):
@@ -620,6 +1341,13 @@ class MethodsVisitorMixins(ClassesVisitorMixins):
     def current_method(self):
         return self._get_last_from_stack(self.Method)
 
+    def load_class(self, facts):
+        class_ = super().load_class(facts)
+        for method_facts in facts['methods']:
+            self.Method.from_facts(method_facts, class_)
+
+        return class_
+
     def visit_FunctionDef(self, node):
         func = self.Method(self._get_obj_name(node), self.current_class)
         func.add_args(node.args)
@@ -1,5 +1,6 @@
 
 import abc
+from collections import deque
 
 from calatrava.utils import import_class_from_str
 
@@ -34,50 +35,100 @@ def load_filter_from_dict(filter_meta):
     return Filter_(**kwargs)
 
 
+def _keep(classes, mask):
+    # mutable (single pass, preserves order)
+    classes[:] = [class_ for class_, keep in zip(classes, mask) if keep]
+    return classes
+
+
 def _find_classes_by_attr(classes, attrs, attr_name="name"):
+    attrs = set(attrs)
     return [class_ for class_ in classes if getattr(class_, attr_name) in attrs]
 
 
-def _find_connected(class_, related=None, ignore=()):
+def _find_connected(class_, related=None, ignore=(), max_depth=None):
     if related is None:
         related = []
 
-    for child in class_.bases + class_.children:
-        if child not in ignore and child not in related:
-            related.append(child)
-            _find_connected(child, related=related, ignore=ignore)
+    # dict as ordered set
+    related_ = dict.fromkeys(related)
+    _find_connected_(class_, related_, set(ignore), max_depth=max_depth)
 
+    related[:] = related_
     return related
 
 
-def _find_related(class_, related=None, ignore=(), look_down=True):
+def _find_connected_(class_, related, ignore, max_depth=None):
+    # breadth-first, so `max_depth` is the distance to `class_`
+    queue = deque([(class_, 0)])
+    while queue:
+        current, depth = queue.popleft()
+        if max_depth is not None and depth >= max_depth:
+            continue
+
+        for child in current.bases + current.children:
+            if child not in ignore and child not in related:
+                related[child] = None
+                queue.append((child, depth + 1))
+
+
+def _find_related(class_, related=None, ignore=(), look_down=True,
+                  max_depth=None):
     if related is None:
         related = []
 
-    for child in class_.bases:
-        if child not in ignore and child not in related:
-            related.append(child)
-            _find_related(child, related=related, ignore=ignore,
-                          look_down=False)
+    related_ = dict.fromkeys(related)
+    _find_related_(class_, related_, set(ignore), look_down=look_down,
+                   max_depth=max_depth)
 
-    if not look_down:
-        return related
+    related[:] = related_
+    return related
 
-    for child in class_.children:
-        if child not in ignore and child not in related:
-            related.append(child)
-            _find_related(child, related=related, ignore=ignore,
-                          look_down=True)
 
-    return related
+def _iter_related(class_, look_down):
+    for base in class_.bases:
+        yield base, False
 
+    if look_down:
+        for child in class_.children:
+            yield child, True
 
-def _remove_unrelated(classes, related):
-    for class_ in classes.copy():
-        if class_ not in related:
-            classes.remove(class_)
 
-    return classes
+def _find_related_(class_, related, ignore, look_down=True, max_depth=None):
+    # ancestors of descendants are collected, but not their descendants.
+    # Depth-first with an explicit stack: visiting order matters, as the
+    # direction a class is expanded in is given by the first path found.
+    # As in `_find_connected_`, `max_depth` is the distance to `class_`:
+    # a class found again closer is expanded again
+    depths = {}
+    looks_down = {}
+
+    stack = [(_iter_related(class_, look_down), 0)]
+    while stack:
+        iterator, depth = stack[-1]
+        for child, child_look_down in iterator:
+            child_depth = depth + 1
+            if child in ignore or (max_depth is not None and child_depth > max_depth):
+                continue
+
+            if child in related:
+                # (classes related before this call are not expanded)
+                if max_depth is None or child_depth >= depths.get(child, 0):
+                    continue
+            else:
+                related[child] = None
+                looks_down[child] = child_look_down
+
+            depths[child] = child_depth
+            stack.append((_iter_related(child, looks_down[child]), child_depth))
+            break
+        else:
+            stack.pop()
+
+
+def _remove_unrelated(classes, related):
+    related = set(related)
+    return _keep(classes, [class_ in related for class_ in classes])
 
 
 class PackageRemover(Filter):
@@ -85,12 +136,8 @@ class PackageRemover(Filter):
         self.names = set(names)
 
     def filter(self, classes):
-        for class_ in classes.copy():
-            package_name = class_.long_name.split('.')[0]
-            if package_name in self.names:
-                classes.remove(class_)
-
-        return classes
+        return _keep(classes, [class_.long_name.split('.')[0] not in self.names
+                               for class_ in classes])
 
 
 class ByNameRemover(Filter):
@@ -100,11 +147,8 @@ class ByNameRemover(Filter):
         self.attr_name = attr_name
 
     def filter(self, classes):
-        for class_ in classes.copy():
-            if getattr(class_, self.attr_name) in self.names:
-                classes.remove(class_)
-
-        return classes
+        return _keep(classes, [getattr(class_, self.attr_name) not in self.names
+                               for class_ in classes])
 
 
 class ByPartialNameRemover(Filter):
@@ -114,14 +158,12 @@ class ByPartialNameRemover(Filter):
         self.attr_name = attr_name
 
     def filter(self, classes):
-        for class_ in classes.copy():
+        mask = []
+        for class_ in classes:
             class_name = getattr(class_, self.attr_name)
-            for name in self.names:
-                if name in class_name:
-                    classes.remove(class_)
-                    break
+            mask.append(not any(name in class_name for name in self.names))
 
-        return classes
+        return _keep(classes, mask)
 
 
 class ByPartialNameKeeper(Filter):
@@ -131,57 +173,63 @@ class ByPartialNameKeeper(Filter):
         self.exceptions = set(exceptions)
 
     def filter(self, classes):
-        for class_ in classes.copy():
+        mask = []
+        for class_ in classes:
             class_name = getattr(class_, self.attr_name)
-            for name in self.names:
-                if name not in class_name:
-                    classes.remove(class_)
-                    break
+            mask.append(all(name in class_name for name in self.names))
 
-        return classes
+        return _keep(classes, mask)
 
 
 class LoneParentsRemover(Filter):
 
     def filter(self, classes):
-        for class_ in classes.copy():
-            if class_.children:
-                for child in class_.children:
-                    if child in classes:
-                        break
-                else:
-                    classes.remove(class_)
+        # removals affect the remaining checks (as when removing in place)
+        remaining = set(classes)
 
-        return classes
+        mask = []
+        for class_ in classes:
+            keep = (not class_.children
+                    or any(child in remaining for child in class_.children))
+            if not keep:
+                remaining.discard(class_)
+            mask.append(keep)
+
+        return _keep(classes, mask)
 
 
 class ConnectedKeeper(Filter):
 
-    def __init__(self, names, attr_name='name', ignore=('abc.ABC', 'abc.ABCMeta',)):
+    def __init__(self, names, attr_name='name', ignore=('abc.ABC', 'abc.ABCMeta',),
+                 max_depth=None):
         self.names = names
         self.attr_name = attr_name
         self.ignore = ignore
+        self.max_depth = max_depth
 
     def filter(self, classes):
         main_classes = _find_classes_by_attr(
             classes, self.names, self.attr_name
         )
-        ignore = _find_classes_by_attr(classes, self.ignore, "long_name")
+        ignore = set(_find_classes_by_attr(classes, self.ignore, "long_name"))
 
-        related = []
+        # main classes are kept even if not found again (e.g. `max_depth`)
+        related = dict.fromkeys(main_classes)
         for main_class in main_classes:
-            _find_connected(main_class, related=related, ignore=ignore)
+            _find_connected_(main_class, related, ignore,
+                             max_depth=self.max_depth)
 
-        return _remove_unrelated(classes, set(related))
+        return _remove_unrelated(classes, related)
 
 
 class RelatedKeeper(Filter):
 
     def __init__(self, names, attr_name='name', ignore=('abc.ABC', 'abc.ABCMeta',),
-                 find_related=None):
+                 find_related=None, max_depth=None):
         self.names = names
         self.attr_name = attr_name
         self.ignore = ignore
+        self.max_depth = max_depth
 
         if find_related is None:
             find_related = _find_related
@@ -194,18 +242,18 @@ class RelatedKeeper(Filter):
         )
         ignore = _find_classes_by_attr(classes, self.ignore, "long_name")
 
-        all_related = []
+        # custom `find_related` may not handle depth
+        kwargs = {'max_depth': self.max_depth} if self.max_depth is not None else {}
+
+        # main classes are kept even if not found again (e.g. `max_depth`)
+        all_related = set(main_classes)
         for main_class in main_classes:
-            related = self.find_related(main_class, ignore=ignore)
-            all_related.extend(related)
+            related = self.find_related(main_class, ignore=ignore, **kwargs)
+            all_related.update(related)
 
-        return _remove_unrelated(classes, set(all_related))
+        return _remove_unrelated(classes, all_related)
 
 
 class AbstractKeeper(Filter):
     def filter(self, classes):
-        for class_ in classes.copy():
-            if not class_.is_abstract:
-                classes.remove(class_)
-
-        return classes
+        return _keep(classes, [class_.is_abstract for class_ in classes])
@@ -1,8 +1,26 @@
 
+import copy
+import json
 import logging
 import os
 
+import graphviz
+
+from calatrava.cache import (
+    ParseCache,
+    RenderCache,
+)
+from calatrava.config import get_global_cache_dir
 from calatrava.config import load_from_config
+from calatrava.viz.graphviz.find_imports import (
+    create_condensed_graph,
+    create_graph as create_imports_graph,
+)
+from calatrava.viz.graphviz.render import (
+    DEFAULT_MAX_QUEUED,
+    RenderScheduler,
+)
+from calatrava.viz.graphviz.stream import DotProcessWriter
 from calatrava.viz.graphviz.uml import (
     create_graph,
     save_graph,
@@ -10,6 +28,21 @@ from calatrava.viz.graphviz.uml import (
 from calatrava.parser.ast.uml import (
     Package,
     PackageManager,
+    load_modules_facts,
+)
+from calatrava.parser.ast.external import ExternalResolver
+from calatrava.parser.ast.find_imports import (
+    Package as ImportsPackage,
+    PackageManager as ImportsPackageManager,
+    find_cycles,
+    find_strongly_connected_components,
+    get_imports_graph,
+)
+from calatrava.post_filters.uml import load_filters_from_ls
+from calatrava.parser.ast.incremental import (
+    IncrementalState,
+    get_state_key,
+    get_state_path,
 )
 
 logging.basicConfig(format='%(message)s', level=logging.INFO)
@@ -34,39 +67,368 @@ def _handle_variadic_input(args):
     return packages, imports
 
 
-def parse_packages(args):
-    packages_paths, imports = _handle_variadic_input(args)
+CLASSES_VISITOR = "basic-attrs-methods"
+
+
+def _create_external_resolver(external, cache_dir=None):
+    if not external:
+        return None
+
+    # installed packages are always cached
+    cache = ParseCache(cache_dir or get_global_cache_dir())
+    return ExternalResolver(external, classes_visitor=CLASSES_VISITOR,
+                            cache=cache)
+
 
-    packages = [Package(package_path, classes_visitor="basic-attrs-methods")
+def _create_package_manager(packages_paths, cache=None, jobs=1, exclude=(),
+                            external_resolver=None):
+    packages = [Package(package_path, classes_visitor=CLASSES_VISITOR,
+                        cache=cache, jobs=jobs, keep_ast=False,
+                        exclude=exclude)
                 for package_path in packages_paths]
-    package_manager = PackageManager(packages)
 
-    if imports:
-        for import_ in imports:
-            if len(import_.split('.')) > 1:
-                package_manager.find(import_)
-            else:
-                package_manager.packages[import_].find_all_classes()
+    return PackageManager(packages, jobs=jobs,
+                          external_resolver=external_resolver)
 
-    else:
-        package_manager.find_all_classes()
+
+def parse_packages(args, cache_dir=None, jobs=1, exclude=(), incremental=False,
+                   external=(), verbose=False):
+    """
+    Args:
+        incremental (bool): reuses the state of the previous run with the
+            same args (stored in `cache_dir` or in the global cache dir).
+        external (list[str]): patterns of installed packages where names
+            not found in the given packages are resolved (see `external`).
+        verbose (bool): logs resolution and cache stats at INFO level
+            (otherwise at DEBUG).
+    """
+    log_stats = logging.info if verbose else logging.debug
+    packages_paths, imports = _handle_variadic_input(args)
+    classes_visitor = CLASSES_VISITOR
+
+    cache = ParseCache(cache_dir) if cache_dir is not None else None
+
+    state = state_path = None
+    if incremental:
+        key = get_state_key(packages_paths, imports, classes_visitor,
+                            exclude=exclude, external=external)
+        state_path = get_state_path(cache_dir or get_global_cache_dir(), key)
+        state = cache = IncrementalState.from_file(state_path, key, cache=cache)
+
+    package_manager = _create_package_manager(
+        packages_paths, cache=cache, jobs=jobs, exclude=exclude,
+        external_resolver=_create_external_resolver(external, cache_dir))
+
+    if state is not None:
+        changed, added_removed = state.apply(package_manager)
+        log_stats(f"Changed modules: {len(changed)}, "
+                  f"added or removed: {len(added_removed)}")
+
+    # parallel parses share the manager pool
+    try:
+        if imports:
+            for import_ in imports:
+                if len(import_.split('.')) > 1:
+                    package_manager.find(import_)
+                else:
+                    package_manager.packages[import_].find_all_classes()
+
+        else:
+            package_manager.find_all_classes()
+    finally:
+        package_manager.shutdown()
 
     package_manager.update_inheritance()
+    log_stats(
+        f"Resolved bases of {package_manager.stats['resolution_steps']} classes "
+        f"in {package_manager.stats['resolution_time']:.2f}s")
+    log_stats(
+        f"Negative cache: {package_manager.negative_cache.stats['hits']} hits, "
+        f"{package_manager.negative_cache.stats['misses']} misses")
+
+    if state is not None:
+        state.save(state_path, package_manager)
+        log_stats(
+            f"Replayed {package_manager.resolution_tracker.stats['replayed']} "
+            f"resolutions")
 
     return package_manager
 
 
 def draw_uml(args, output_filename="calatrava_tree", output_format="svg",
-             config=None, view=True):
-
-    package_manager = parse_packages(args)
+             config=None, view=True, cache_dir=None, jobs=1, exclude=(),
+             incremental=False, render_cache_dir=None, stream=False,
+             external=(), verbose=False):
+    """
+    Args:
+        stream (bool): writes the graph directly to the input of `dot`
+            (the source is not kept in memory nor cached).
+    """
+    package_manager = parse_packages(args, cache_dir=cache_dir, jobs=jobs,
+                                     exclude=exclude, incremental=incremental,
+                                     external=external, verbose=verbose)
 
     classes = sorted(list(package_manager.get_classes().values()),
                      key=lambda x: x.name)
 
     record_creator, filters = load_from_config(config)
 
-    dot = create_graph(classes, filters=filters, record_creator=record_creator)
+    if stream:
+        if render_cache_dir is not None:
+            logging.info("Render cache is not used when streaming")
+
+        output_path = f'{output_filename}.{output_format}'
+        with DotProcessWriter(output_path, format=output_format) as dot:
+            create_graph(classes, filters=filters, record_creator=record_creator,
+                         dot=dot)
+
+        if view:
+            graphviz.view(output_path)
+
+    else:
+        dot = create_graph(classes, filters=filters, record_creator=record_creator)
+
+        render_cache = RenderCache(render_cache_dir) if render_cache_dir is not None else None
+        save_graph(dot, output_filename, view=view, format=output_format,
+                   cache=render_cache)
 
-    save_graph(dot, output_filename, view=view, format=output_format)
     logging.info(f"Created `{output_filename}.{output_format}`")
+
+
+def load_views(filename):
+    with open(filename, 'r') as file:
+        data = json.load(file)
+
+    if isinstance(data, dict):
+        return data['views']
+
+    return data
+
+
+def _get_nested_classes(class_, nested_index):
+    module_index = nested_index.get(id(class_.module), None)
+    if module_index is None:
+        module_index = nested_index[id(class_.module)] = {}
+        for other in class_.module.classes.values():
+            name_ls = other.name.split('.')
+            for i in range(1, len(name_ls)):
+                module_index.setdefault('.'.join(name_ls[:i]), []).append(other)
+
+    return module_index.get(class_.name, [])
+
+
+def _get_view_classes(all_classes, roots, nested_index):
+    # what a parse of the view alone finds: roots, their nested classes
+    # and bases (recursively)
+    reached = {}
+    stack = list(roots)
+    while stack:
+        class_ = stack.pop()
+        if id(class_) in reached:
+            continue
+
+        reached[id(class_)] = class_
+        stack.extend(class_.bases)
+        if class_.found:
+            stack.extend(_get_nested_classes(class_, nested_index))
+
+    # copies only see children in the view
+    copies = {key: copy.copy(class_) for key, class_ in reached.items()}
+    for class_ in copies.values():
+        class_.bases = [copies[id(base)] for base in class_.bases]
+        class_.children = [copies[id(child)] for child in class_.children
+                           if id(child) in copies]
+        class_._clear_cache()
+
+    return [copies[id(class_)] for class_ in all_classes.values()
+            if id(class_) in copies]
+
+
+def _parse_views_group(views_args, packages_paths, cache=None, jobs=1,
+                       exclude=(), external=(), cache_dir=None):
+    # views of the same packages
+    package_manager = _create_package_manager(
+        packages_paths, cache=cache, jobs=jobs, exclude=exclude,
+        external_resolver=_create_external_resolver(external, cache_dir))
+
+    # dict as ordered set
+    modules_names = {}
+    views_imports = []
+    for view_packages_paths, imports in views_args:
+        if not imports:
+            imports = [package_path.split(os.sep)[-1]
+                       for package_path in view_packages_paths]
+
+        view_modules_names = []
+        classes_names = []
+        for import_ in imports:
+            if len(import_.split('.')) == 1:
+                import_modules_names = package_manager.packages[import_].modules_names
+            else:
+                package = package_manager._get_package(import_, raise_=True)
+                import_modules_names = package.get_import_modules_names(import_)
+
+            if import_modules_names is None:
+                classes_names.append(import_)
+            else:
+                view_modules_names.extend(import_modules_names)
+
+        modules_names.update(dict.fromkeys(view_modules_names))
+        views_imports.append((view_modules_names, classes_names))
+
+    # modules first, as finding their classes after a class lookup
+    # would load the class again
+    modules = [package_manager.find_module(module_name) for module_name in modules_names]
+    try:
+        load_modules_facts(modules, jobs=jobs, executor=package_manager.get_executor())
+        modules_classes = {module.long_name: module.find_all_classes() for module in modules}
+
+        found_classes = {}
+        for _, classes_names in views_imports:
+            for class_name in classes_names:
+                if class_name not in found_classes:
+                    found_classes[class_name] = package_manager.find(class_name)
+    finally:
+        package_manager.shutdown()
+
+    package_manager.update_inheritance()
+
+    all_classes = package_manager.get_classes()
+    nested_index = {}
+    views_classes = []
+    for view_modules_names, classes_names in views_imports:
+        roots = [class_ for module_name in view_modules_names
+                 for class_ in modules_classes[module_name]]
+        roots.extend(found_classes[class_name] for class_name in classes_names)
+
+        views_classes.append(_get_view_classes(all_classes, roots, nested_index))
+
+    return package_manager, views_classes
+
+
+def parse_views(views, cache_dir=None, jobs=1, exclude=(), external=()):
+    """Parses the packages of the views, once per set of packages.
+
+    Views with the same packages share a parse (which names resolve
+    depends on the given packages, so each view matches a parse of the
+    view alone). Modules facts are shared through `cache_dir`.
+
+    Returns:
+        tuple: package managers (one per set of packages) and list with the
+            classes of each view.
+    """
+    views_args = [_handle_variadic_input(view['args']) for view in views]
+
+    # packages -> indices of views
+    groups = {}
+    for index, (view_packages_paths, _) in enumerate(views_args):
+        groups.setdefault(tuple(view_packages_paths), []).append(index)
+
+    cache = ParseCache(cache_dir) if cache_dir is not None else None
+    package_managers = []
+    views_classes = [None] * len(views)
+    for packages_paths, indices in groups.items():
+        package_manager, group_classes = _parse_views_group(
+            [views_args[index] for index in indices], list(packages_paths),
+            cache=cache, jobs=jobs, exclude=exclude, external=external,
+            cache_dir=cache_dir)
+
+        package_managers.append(package_manager)
+        for index, classes in zip(indices, group_classes):
+            views_classes[index] = classes
+
+    return package_managers, views_classes
+
+
+def draw_uml_batch(views, cache_dir=None, jobs=1, exclude=(), view=False,
+                   render_jobs=None, timeout=None, max_nodes=None,
+                   render_cache_dir=None, external=(),
+                   max_queued=DEFAULT_MAX_QUEUED):
+    """Draws several views parsing each set of packages once.
+
+    Args:
+        views (list[dict]): each with `args` (as in `draw_uml`) and optionally
+            `output_filename`, `output_format`, `config` and `filters`
+            (applied after the ones in `config`).
+        render_jobs (int): concurrent graphviz processes.
+        timeout (float): seconds allowed for rendering each graph.
+        max_nodes (int): graphs with more nodes are rendered with `sfdp`.
+        render_cache_dir (str): reuses diagrams rendered from the same source.
+        max_queued (int): graphs built and waiting to be rendered (None for
+            no limit).
+
+    Returns:
+        list: filename and exception of each graph that failed to render.
+    """
+    _, views_classes = parse_views(views, cache_dir=cache_dir, jobs=jobs,
+                                   exclude=exclude, external=external)
+
+    render_cache = RenderCache(render_cache_dir) if render_cache_dir is not None else None
+    with RenderScheduler(max_workers=render_jobs, max_queued=max_queued,
+                         timeout=timeout, max_nodes=max_nodes,
+                         cache=render_cache) as scheduler:
+        # graphs are built as they are submitted (blocks while queue is full)
+        for index, (view_data, classes) in enumerate(zip(views, views_classes)):
+            classes = sorted(classes, key=lambda x: x.name)
+
+            record_creator, filters = load_from_config(view_data.get('config', None))
+            filters.extend(load_filters_from_ls(view_data.get('filters', [])))
+
+            dot = create_graph(classes, filters=filters, record_creator=record_creator)
+            output_filename = view_data.get('output_filename', f'calatrava_tree_{index}')
+            output_format = view_data.get('output_format', 'svg')
+            scheduler.submit(dot, output_filename, format=output_format, view=view)
+
+        output_paths, failures = scheduler.wait()
+
+    for output_path in output_paths:
+        logging.info(f"Created `{output_path}`")
+    for output_filename, exception in failures:
+        logging.error(f"Failed to render `{output_filename}`: {exception!r}")
+
+    return failures
+
+
+def draw_imports(packages_paths, output_filename="calatrava_imports",
+                 output_format="svg", view=True, exclude=(), condense=False,
+                 draw=True, cache_dir=None):
+    """Draws the module import graph and reports import cycles.
+
+    Args:
+        condense (bool): draws each import cycle (strongly connected
+            component) as a single node, so the graph is a DAG.
+        draw (bool): if False, only cycles are reported.
+        cache_dir (str): modules facts are shared with `draw_uml` runs
+            using the same dir.
+
+    Returns:
+        list[list]: modules names of each import cycle.
+    """
+    # classes are only extracted if facts can be shared
+    cache = ParseCache(cache_dir) if cache_dir is not None else None
+    classes_visitor = CLASSES_VISITOR if cache is not None else None
+    package_manager = ImportsPackageManager(
+        [ImportsPackage(package_path, exclude=exclude, cache=cache,
+                        classes_visitor=classes_visitor)
+         for package_path in packages_paths])
+    package_manager.find_modules()
+    package_manager.get_imports()
+
+    graph = get_imports_graph(package_manager)
+    components = find_strongly_connected_components(graph)
+    cycles = find_cycles(graph, components)
+
+    for cycle in cycles:
+        logging.info(f"Import cycle: {', '.join(sorted(cycle))}")
+    logging.info(f"Found {len(cycles)} import cycles in {len(graph)} modules")
+
+    if draw:
+        if condense:
+            dot = create_condensed_graph(graph, components)
+        else:
+            dot = create_imports_graph(package_manager)
+
+        save_graph(dot, output_filename, view=view, format=output_format)
+        logging.info(f"Created `{output_filename}.{output_format}`")
+
+    return cycles
@@ -1,6 +1,10 @@
 
 import graphviz
 
+from calatrava.parser.ast.find_imports import (
+    ModulesTrie,
+    condense_graph,
+)
 from calatrava.viz.graphviz.base import BaseRecordCreator
 
 
@@ -27,29 +31,40 @@ class ModuleRecordCreator(BaseRecordCreator):
         dot.node(module.id, label=module.long_name, **self.styles["normal"])
 
 
-def create_graph(package_manager, exclude=(), add_to_modules_names=None):
+def create_graph(package_manager, exclude=(), add_to_modules_names=None,
+                 dot=None):
     # TODO
     # for now is very particular
 
+    # `dot` may be a `DotWriter` (to avoid keeping the source in memory)
+
     if add_to_modules_names is None:
         add_to_modules_names = {}
 
-    # collect imports and modules
-    all_internal_imports = []
+    # collect imports and modules (resolved once per module)
+    modules_imports = {}
     for package in package_manager.packages_ls:
-        modules_names = package.modules_names | set(add_to_modules_names.get(package.name, []))
+        modules_trie = package.modules_trie
+        extra_modules_names = add_to_modules_names.get(package.name, [])
+        if extra_modules_names:
+            modules_trie = ModulesTrie(package.modules_names | set(extra_modules_names))
+
         for module in package.modules_ls:
-            all_internal_imports.extend(
-                module.get_module_level_internal_imports(modules_names)
-            )
+            modules_imports[module.long_name] = module.get_module_level_internal_imports(
+                modules_trie)
+
+    all_internal_imports = set()
+    for imports in modules_imports.values():
+        all_internal_imports.update(imports)
+    all_internal_imports.difference_update(exclude)
 
-    all_internal_imports = set(all_internal_imports) - set(exclude)
-    all_parsed_modules = package_manager.modules
+    all_parsed_modules = dict(package_manager.modules)
     for exclude_import in exclude:
         if exclude_import in all_parsed_modules:
             del all_parsed_modules[exclude_import]
 
-    dot = graphviz.Digraph()
+    if dot is None:
+        dot = graphviz.Digraph()
 
     # draw nodes
     module_record_creator = ModuleRecordCreator(color="blue")
@@ -69,10 +84,65 @@ def create_graph(package_manager, exclude=(), add_to_modules_names=None):
 
     # draw edges
     for module in all_parsed_modules.values():
-        for internal_import in set(module.get_module_level_internal_imports(modules_names)):
+        for internal_import in dict.fromkeys(modules_imports.get(module.long_name, ())):
             if internal_import not in all_internal_imports:
                 continue
 
             dot.edge(module.id, _get_id(internal_import))
 
     return dot
+
+
+class CycleRecordCreator(BaseRecordCreator):
+
+    def __init__(self, shape="record", color="red"):
+        styles = {"normal": {"shape": shape, "color": color}}
+        super().__init__(default_styles={}, styles=styles)
+
+    def create_node(self, dot, id_, names):
+        label = '{' + f"cycle ({len(names)})|" + r'\l'.join(sorted(names)) + r'\l}'
+        dot.node(id_, label=label, **self.styles["normal"])
+
+
+def create_condensed_graph(graph, components, dot=None):
+    """Draws each strongly connected component as a node.
+
+    Args:
+        graph (dict): module name -> imported modules names.
+        components (list[list]): strongly connected components of `graph`.
+    """
+    if dot is None:
+        dot = graphviz.Digraph()
+
+    module_record_creator = GenericRecordCreator(color="blue")
+    record_creator = GenericRecordCreator(shape="oval")
+    cycle_record_creator = CycleRecordCreator()
+
+    condensed = condense_graph(graph, components)
+
+    # isolated modules are not drawn
+    connected = {index for index, adjacent in condensed.items() if adjacent}
+    connected.update(other_index for adjacent in condensed.values()
+                     for other_index in adjacent)
+
+    ids = {}
+    for index, component in enumerate(components):
+        if len(component) == 1 and index not in connected:
+            continue
+
+        if len(component) > 1:
+            id_ = f"cycle_{index}"
+            cycle_record_creator.create_node(dot, id_, component)
+        else:
+            name = component[0]
+            id_ = _get_id(name)
+            creator = module_record_creator if name in graph else record_creator
+            creator.create_node(dot, id_, name)
+
+        ids[index] = id_
+
+    for index, adjacent in condensed.items():
+        for other_index in adjacent:
+            dot.edge(ids[index], ids[other_index])
+
+    return dot
@@ -0,0 +1,188 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import subprocess
+import threading
+
+import graphviz
+
+
+DOT_KEYWORDS = {'graph', 'digraph', 'subgraph', 'node', 'edge', 'strict'}
+
+DEFAULT_MAX_QUEUED = 8
+
+
+def _split_id(statement):
+    # leading ID of a statement (quoted, HTML or plain) and the rest
+    if statement.startswith('"'):
+        index = 1
+        while index < len(statement) and statement[index] != '"':
+            index += 2 if statement[index] == '\\' else 1
+        end = index + 1
+
+    elif statement.startswith('<'):
+        depth = 0
+        end = len(statement)
+        for index, char in enumerate(statement):
+            depth += {'<': 1, '>': -1}.get(char, 0)
+            if depth == 0:
+                end = index + 1
+                break
+
+    else:
+        end = 0
+        while end < len(statement) and (statement[end].isalnum()
+                                        or statement[end] in '_.'):
+            end += 1
+
+    return statement[:end], statement[end:].lstrip()
+
+
+def count_nodes(dot):
+    """Number of distinct nodes declared in node statements.
+
+    Edges, attribute statements (e.g. `graph [...]`) and assignments
+    (e.g. `rankdir=LR`) are not nodes. Nodes only used in edges are not
+    counted.
+    """
+    nodes = set()
+    for statement in dot.body:
+        id_, rest = _split_id(statement.strip())
+        if not id_ or id_ in DOT_KEYWORDS:
+            continue
+
+        if not rest or rest.startswith('['):
+            nodes.add(id_)
+
+    return len(nodes)
+
+
+def render(dot, filename, format='svg', engine='dot', view=False, cleanup=True,
+           timeout=None, cache=None):
+    """Renders the graph in a subprocess (as `graphviz.Digraph.render`).
+
+    Args:
+        cache (RenderCache): layout is skipped if the same source was
+            already rendered.
+
+    Returns:
+        str: path of the rendered file.
+    """
+    output_path = f'{filename}.{format}'
+
+    key = None
+    if cache is not None:
+        key = cache.get_key(dot.source, format, engine)
+        if cache.load(key, output_path):
+            if not cleanup:
+                dot.save(filename)
+            if view:
+                graphviz.view(output_path)
+
+            return output_path
+
+    source_path = dot.save(filename)
+    try:
+        subprocess.run([engine, f'-T{format}', '-o', output_path, source_path],
+                       check=True, timeout=timeout, capture_output=True)
+    except FileNotFoundError as e:
+        raise graphviz.ExecutableNotFound([engine]) from e
+    finally:
+        if cleanup:
+            os.remove(source_path)
+
+    if key is not None:
+        cache.store(key, output_path)
+
+    if view:
+        graphviz.view(output_path)
+
+    return output_path
+
+
+class RenderScheduler:
+    """Renders graphs concurrently, each in a graphviz process.
+
+    Args:
+        max_workers (int): concurrent processes (default as in
+            `ThreadPoolExecutor`).
+        max_queued (int): graphs waiting for a worker. `submit` blocks above
+            it (so graphs can be built as they are submitted). No limit if
+            None.
+        timeout (float): seconds per graph. No limit if None.
+        fallback_engine (str): used for graphs with more than `max_nodes`.
+        cache (RenderCache): reuses diagrams rendered from the same source.
+    """
+
+    def __init__(self, max_workers=None, max_queued=DEFAULT_MAX_QUEUED, timeout=None,
+                 engine='dot', fallback_engine='sfdp', max_nodes=None,
+                 cache=None):
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.timeout = timeout
+        self.engine = engine
+        self.fallback_engine = fallback_engine
+        self.max_nodes = max_nodes
+        self.cache = cache
+
+        self._slots = None
+        if max_queued is not None:
+            self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def get_engine(self, dot):
+        if self.max_nodes is not None and count_nodes(dot) > self.max_nodes:
+            return self.fallback_engine
+
+        return self.engine
+
+    def submit(self, dot, filename, format='svg', view=False, cleanup=True):
+        engine = self.get_engine(dot)
+        if engine != self.engine:
+            logging.info(f"Rendering `{filename}` with `{engine}`")
+
+        if self._slots is not None:
+            self._slots.acquire()
+
+        future = self.executor.submit(render, dot, filename, format=format,
+                                      engine=engine, view=view, cleanup=cleanup,
+                                      timeout=self.timeout, cache=self.cache)
+        if self._slots is not None:
+            future.add_done_callback(lambda _: self._slots.release())
+
+        self._futures.append((filename, future))
+
+        return future
+
+    def wait(self):
+        """Waits for all submitted graphs.
+
+        A failure (e.g. timeout) does not stop the other graphs.
+
+        Returns:
+            tuple: rendered paths and list with the filename and exception of
+                each failed graph.
+        """
+        futures, self._futures = self._futures, []
+
+        output_paths = []
+        failures = []
+        for filename, future in futures:
+            try:
+                output_paths.append(future.result())
+            except Exception as e:
+                failures.append((filename, e))
+
+        return output_paths, failures
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
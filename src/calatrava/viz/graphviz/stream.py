@@ -0,0 +1,88 @@
+"""Directed graphs written while created.
+
+`DotWriter` has the `node` and `edge` methods of `graphviz.Digraph` and
+outputs the same source, but lines are written instead of kept in memory.
+"""
+
+import subprocess
+import tempfile
+
+import graphviz
+from graphviz.quoting import (
+    attr_list,
+    quote,
+    quote_edge,
+)
+
+
+class DotWriter:
+
+    def __init__(self, file):
+        self.file = file
+
+        self.file.write('digraph {\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        self.close(write_tail=exc_type is None)
+
+    def node(self, name, label=None, **attrs):
+        self.file.write(f'\t{quote(name)}{attr_list(label, kwargs=attrs)}\n')
+
+    def edge(self, tail_name, head_name, label=None, **attrs):
+        self.file.write(f'\t{quote_edge(tail_name)} -> {quote_edge(head_name)}'
+                        f'{attr_list(label, kwargs=attrs)}\n')
+
+    def close(self, write_tail=True):
+        if write_tail:
+            self.file.write('}\n')
+        self.file.close()
+
+
+class DotProcessWriter(DotWriter):
+    """Writes to the input of a graphviz process.
+
+    Args:
+        output_path (str): rendered file.
+    """
+
+    def __init__(self, output_path, format='svg', engine='dot', timeout=None):
+        # not a pipe: it is only read at the end, so warnings written while
+        # the input is written could fill it and block both processes
+        self.stderr = tempfile.TemporaryFile('w+', encoding='utf-8')
+        try:
+            self.process = subprocess.Popen(
+                [engine, f'-T{format}', '-o', output_path],
+                stdin=subprocess.PIPE, stderr=self.stderr, encoding='utf-8')
+        except FileNotFoundError as e:
+            self.stderr.close()
+            raise graphviz.ExecutableNotFound([engine]) from e
+
+        self.output_path = output_path
+        self.timeout = timeout
+
+        super().__init__(self.process.stdin)
+
+    def close(self, write_tail=True):
+        with self.stderr:
+            if not write_tail:
+                self.process.kill()
+                self.process.wait()
+                return
+
+            self.file.write('}\n')
+            try:
+                # closes input
+                self.process.communicate(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+                raise
+
+            if self.process.returncode != 0:
+                self.stderr.seek(0)
+                raise graphviz.CalledProcessError(
+                    self.process.returncode, self.process.args,
+                    stderr=self.stderr.read())
@@ -4,6 +4,7 @@ import graphviz
 from calatrava.post_filters.uml import apply_filters
 from calatrava.utils import import_class_from_str
 from calatrava.viz.graphviz.base import BaseRecordCreator
+from calatrava.viz.graphviz.render import render
 
 
 def _get_block_str(block, symbol='', keep_private=True):
@@ -133,20 +134,23 @@ class RecordCreator(BaseRecordCreator):
 DEFAULT_RECORD_CREATOR = RecordCreator
 
 
-def create_graph(classes, record_creator=None, filters=()):
+def create_graph(classes, record_creator=None, filters=(), dot=None):
+    # `dot` may be a `DotWriter` (to avoid keeping the source in memory)
     if record_creator is None:
         record_creator = DEFAULT_RECORD_CREATOR()
 
     filtered_classes = apply_filters(filters, classes)
 
-    dot = graphviz.Digraph()
+    if dot is None:
+        dot = graphviz.Digraph()
 
     for class_ in filtered_classes:
         record_creator.create_node(dot, class_)
 
+    filtered_classes_set = set(filtered_classes)
     for class_ in filtered_classes:
         for base_class in class_.bases:
-            if base_class not in filtered_classes:
+            if base_class not in filtered_classes_set:
                 continue
 
             dot.edge(base_class.id, class_.id, dir='back', arrowtail='empty')
@@ -154,5 +158,10 @@ def create_graph(classes, record_creator=None, filters=()):
     return dot
 
 
-def save_graph(dot, filename, view=True, format='svg', cleanup=True, **kwargs):
-    dot.render(filename, view=view, format=format, cleanup=cleanup, **kwargs)
+def save_graph(dot, filename, view=True, format='svg', cleanup=True, cache=None,
+               **kwargs):
+    if cache is not None:
+        render(dot, filename, view=view, format=format, cleanup=cleanup,
+               cache=cache, **kwargs)
+    else:
+        dot.render(filename, view=view, format=format, cleanup=cleanup, **kwargs)
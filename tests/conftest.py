@@ -0,0 +1,72 @@
+import pytest
+
+from calatrava.viz.graphviz.uml import create_graph
+
+
+CLICK_PACKAGE = {
+    '__init__.py': '',
+    'commands.py': '''
+from click import Command, Group
+from json import JSONDecoder
+
+
+class MyCommand(Command):
+    def invoke(self, ctx):
+        self.ctx = ctx
+
+
+class MyGroup(Group):
+    pass
+
+
+class Decoder(JSONDecoder):
+    pass
+''',
+    'sub/__init__.py': 'from .models import *\n',
+    'sub/models.py': '''
+from abc import ABC, abstractmethod
+
+from ..commands import MyCommand
+
+
+class Base(ABC):
+    @abstractmethod
+    def run(self):
+        pass
+
+
+class Model(Base, MyCommand):
+    def run(self):
+        self.value = 1
+''',
+}
+
+
+@pytest.fixture
+def make_package(tmp_path):
+    def _make_package(files, name='calpkg'):
+        path = tmp_path / name
+        for rel_path, content in files.items():
+            file_path = path / rel_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(content)
+
+        return str(path)
+
+    return _make_package
+
+
+@pytest.fixture
+def click_package(make_package):
+    return make_package(CLICK_PACKAGE)
+
+
+@pytest.fixture
+def get_dot_lines():
+    # sorted lines of the graph of a package manager (to compare runs)
+    def _get_dot_lines(package_manager):
+        classes = sorted(package_manager.get_classes().values(),
+                         key=lambda class_: (class_.name, class_.long_name))
+        return sorted(create_graph(classes).source.splitlines())
+
+    return _get_dot_lines
@@ -0,0 +1,94 @@
+import pytest
+
+from calatrava.scripts import parse_packages
+
+np = pytest.importorskip('numpy')
+
+from calatrava.analysis import ClassGraph  # noqa: E402
+
+
+SHAPES = '''\
+from abc import ABC
+
+
+class Shape(ABC):
+    pass
+
+
+class Root:
+    pass
+
+
+class Left(Root):
+    pass
+
+
+class Right(Root, Shape):
+    pass
+
+
+class Diamond(Left, Right):
+    pass
+'''
+
+LEAVES = '''\
+from pkga.shapes import Diamond
+
+
+class Leaf(Diamond):
+    pass
+'''
+
+
+@pytest.fixture
+def graph(make_package):
+    pkga_path = make_package({'__init__.py': '', 'shapes.py': SHAPES}, name='pkga')
+    pkgb_path = make_package({'__init__.py': '', 'leaves.py': LEAVES}, name='pkgb')
+
+    package_manager = parse_packages([pkga_path, pkgb_path])
+    return ClassGraph.from_classes(package_manager.get_classes())
+
+
+def _by_name(graph, values):
+    return {name.split('.')[-1]: value.item() for name, value in zip(graph.names, values)}
+
+
+def test_degrees(graph):
+    assert _by_name(graph, graph.fan_out()) == {
+        'ABC': 0, 'Shape': 1, 'Root': 0, 'Left': 1, 'Right': 2, 'Diamond': 2,
+        'Leaf': 1}
+    assert _by_name(graph, graph.fan_in()) == {
+        'ABC': 1, 'Shape': 1, 'Root': 2, 'Left': 1, 'Right': 1, 'Diamond': 1,
+        'Leaf': 0}
+
+
+def test_depth(graph):
+    # longest path: Right is below Shape
+    assert _by_name(graph, graph.depth()) == {
+        'ABC': 0, 'Shape': 1, 'Root': 0, 'Left': 1, 'Right': 2, 'Diamond': 3,
+        'Leaf': 4}
+
+
+@pytest.mark.parametrize('block_size', [4096, 2])
+def test_n_descendants(graph, block_size):
+    # Diamond is reached twice from Root, but counted once
+    assert _by_name(graph, graph.n_descendants(block_size=block_size)) == {
+        'ABC': 4, 'Shape': 3, 'Root': 4, 'Left': 2, 'Right': 2, 'Diamond': 1,
+        'Leaf': 0}
+
+
+def test_abstract_ratio_and_top(graph):
+    assert graph.abstract_ratio_by_package() == {'pkga': 0.2, 'pkgb': 0.0}
+    assert graph.top(graph.fan_in(), k=1) == [('pkga.shapes.Root', 2)]
+
+
+def test_depth_of_cycles():
+    # a <-> b (badly resolved names), c below a
+    bases_indptr = np.array([0, 1, 2, 3])
+    bases_indices = np.array([1, 0, 0])
+    graph = ClassGraph(['a', 'b', 'c'], bases_indptr, bases_indices, [],
+                       np.full(3, -1), np.zeros(3, dtype=bool),
+                       np.zeros(3, dtype=bool))
+
+    assert graph.depth().tolist() == [-1, -1, -1]
+    assert graph.n_descendants().tolist() == [0, 0, 0]
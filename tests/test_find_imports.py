@@ -0,0 +1,127 @@
+import pytest
+
+from calatrava.cache import ParseCache
+from calatrava.parser.ast.find_imports import (
+    ImportsVisitor,
+    Module,
+    ModulesTrie,
+    Package,
+    PackageManager,
+    condense_graph,
+    find_cycles,
+    find_strongly_connected_components,
+)
+from calatrava.scripts import (
+    CLASSES_VISITOR,
+    parse_packages,
+)
+
+
+def _get_imports(package):
+    package_manager = PackageManager([package])
+    package_manager.find_modules()
+    package_manager.get_imports()
+
+    return {module.long_name: module.imports for module in package.modules_ls}
+
+
+@pytest.fixture
+def expected_imports():
+    return {
+        'calpkg': [],
+        'calpkg.commands': ['click.Command', 'click.Group', 'json.JSONDecoder'],
+        'calpkg.sub': ['calpkg.sub.models.*'],
+        'calpkg.sub.models': ['abc.ABC', 'abc.abstractmethod',
+                              'calpkg.commands.MyCommand'],
+    }
+
+
+def test_imports_from_facts(click_package, expected_imports):
+    assert _get_imports(Package(click_package)) == expected_imports
+
+
+def test_imports_visitor(click_package, expected_imports):
+    Module_ = lambda long_name, package: Module(long_name, package,
+                                                ImportsVisitor=ImportsVisitor)
+
+    assert _get_imports(Package(click_package, Module=Module_)) == expected_imports
+
+
+def test_imports_share_facts_with_uml(click_package, tmp_path, expected_imports,
+                                      monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    parse_packages([click_package], cache_dir=cache_dir)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError('module parsed again')
+
+    monkeypatch.setattr('calatrava.parser.ast.facts.extract_module_facts', _fail)
+
+    package = Package(click_package, cache=ParseCache(cache_dir),
+                      classes_visitor=CLASSES_VISITOR)
+    assert _get_imports(package) == expected_imports
+
+
+def test_module_level_internal_imports(click_package, monkeypatch):
+    package = Package(click_package)
+    _get_imports(package)
+    module = package.modules['calpkg.sub']
+
+    # sets are resolved without building a trie
+    monkeypatch.setattr(ModulesTrie, 'add', None)
+    assert (module.get_module_level_internal_imports(set(package.modules_names))
+            == ['calpkg.sub.models'])
+    monkeypatch.undo()
+
+    trie = ModulesTrie(package.modules_names)
+    imports = module.get_module_level_internal_imports(trie)
+    assert imports == ['calpkg.sub.models']
+    assert module.get_module_level_internal_imports(trie) is imports
+
+    # only the last trie is memoized
+    other_trie = ModulesTrie(package.modules_names)
+    module.get_module_level_internal_imports(other_trie)
+    assert module.get_module_level_internal_imports(trie) is not imports
+
+
+def _sorted_components(components):
+    return [sorted(component) for component in components]
+
+
+def test_self_import_is_a_cycle():
+    graph = {'a': ['a', 'b'], 'b': []}
+    components = find_strongly_connected_components(graph)
+
+    assert _sorted_components(components) == [['b'], ['a']]
+    assert find_cycles(graph, components) == [['a']]
+    assert condense_graph(graph, components) == {0: [], 1: [0]}
+
+
+def test_components_linked_by_one_edge():
+    graph = {'a': ['b'], 'b': ['a', 'c'], 'c': ['d'], 'd': ['c']}
+    components = find_strongly_connected_components(graph)
+
+    # reverse topological order
+    assert _sorted_components(components) == [['c', 'd'], ['a', 'b']]
+    assert _sorted_components(find_cycles(graph)) == [['c', 'd'], ['a', 'b']]
+    assert condense_graph(graph, components) == {0: [], 1: [0]}
+
+
+def test_acyclic_graph():
+    # `d` is only imported
+    graph = {'a': ['b', 'c'], 'b': ['c', 'd'], 'c': []}
+    components = find_strongly_connected_components(graph)
+
+    assert components == [['c'], ['d'], ['b'], ['a']]
+    assert find_cycles(graph, components) == []
+    assert condense_graph(graph, components) == {0: [], 1: [], 2: [0, 1], 3: [2, 0]}
+
+
+def test_deep_graph_components():
+    # deeper than the recursion limit
+    n_nodes = 5000
+    graph = {index: [index + 1] for index in range(n_nodes)}
+    graph[n_nodes] = [0]
+
+    components = find_strongly_connected_components(graph)
+    assert len(components) == 1 and len(components[0]) == n_nodes + 1
@@ -0,0 +1,85 @@
+import pytest
+
+from calatrava.parser.ast.uml import DummyClass
+from calatrava.post_filters.uml import (
+    ConnectedKeeper,
+    RelatedKeeper,
+    _find_connected_,
+    _find_related,
+)
+
+
+def _create_classes(bases):
+    classes = {name: DummyClass(name) for name in bases}
+    for name, bases_names in bases.items():
+        for base_name in bases_names:
+            classes[name].add_base(classes[base_name])
+
+    return classes
+
+
+@pytest.fixture
+def classes():
+    # R(A, X), A(X), X(Y): Y is 2 hops away from R (through X)
+    return _create_classes({'R': ['A', 'X'], 'A': ['X'], 'X': ['Y'], 'Y': []})
+
+
+def _find_related_names(class_, max_depth):
+    # `class_` is found again from its descendants (or from its bases, when
+    # connected), so it is left out
+    return sorted(other.name for other in _find_related(class_, max_depth=max_depth)
+                  if other is not class_)
+
+
+def _find_connected_names(class_, max_depth):
+    related = {}
+    _find_connected_(class_, related, set(), max_depth=max_depth)
+    return sorted(other.name for other in related if other is not class_)
+
+
+@pytest.mark.parametrize('max_depth,expected', [
+    (None, ['A', 'X', 'Y']),
+    (0, []),
+    (1, ['A', 'X']),
+    (2, ['A', 'X', 'Y']),
+])
+def test_find_related_max_depth(classes, max_depth, expected):
+    assert _find_related_names(classes['R'], max_depth) == expected
+
+
+@pytest.mark.parametrize('max_depth', [0, 1, 2])
+def test_related_and_connected_agree_on_max_depth(classes, max_depth):
+    # only bases are reached in both cases
+    assert (_find_related_names(classes['R'], max_depth)
+            == _find_connected_names(classes['R'], max_depth))
+
+
+def test_find_related_does_not_look_down_from_ancestors():
+    # S is a descendant of an ancestor
+    classes = _create_classes({'R': ['B'], 'B': [], 'S': ['B'], 'C': ['R']})
+
+    assert _find_related_names(classes['R'], None) == ['B', 'C']
+
+
+@pytest.fixture
+def chain():
+    # A <- B <- C <- D
+    return list(_create_classes({'A': [], 'B': ['A'], 'C': ['B'], 'D': ['C']}).values())
+
+
+@pytest.mark.parametrize('Keeper,max_depth,expected', [
+    (ConnectedKeeper, None, ['A', 'B', 'C', 'D']),
+    (ConnectedKeeper, 0, ['B']),
+    (ConnectedKeeper, 1, ['A', 'B', 'C']),
+    (RelatedKeeper, None, ['A', 'B', 'C', 'D']),
+    (RelatedKeeper, 0, ['B']),
+    (RelatedKeeper, 1, ['A', 'B', 'C']),
+])
+def test_keepers_keep_main_classes(chain, Keeper, max_depth, expected):
+    classes = Keeper(['B'], max_depth=max_depth).filter(chain)
+    assert [class_.name for class_ in classes] == expected
+
+
+def test_related_keeper_keeps_main_class_without_children(chain):
+    classes = RelatedKeeper(['D']).filter(chain)
+    assert [class_.name for class_ in classes] == ['A', 'B', 'C', 'D']
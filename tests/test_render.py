@@ -0,0 +1,130 @@
+import sys
+import textwrap
+
+import graphviz
+import pytest
+
+from calatrava.cache import RenderCache
+from calatrava.scripts import parse_packages
+from calatrava.viz.graphviz.render import (
+    RenderScheduler,
+    count_nodes,
+    render,
+)
+from calatrava.viz.graphviz.stream import DotProcessWriter
+from calatrava.viz.graphviz.uml import create_graph
+
+
+def test_count_nodes_ignores_attributes():
+    dot = graphviz.Digraph()
+    dot.attr(rankdir='LR')
+    dot.attr('node', shape='record')
+    dot.node('a', label='a -> b')
+    dot.node('b')
+    dot.node('"quoted node"', label='{x|y}')
+    dot.edge('a', 'b')
+    dot.edge('b', 'c')
+
+    assert count_nodes(dot) == 3
+
+
+def test_count_nodes_of_uml_graph(click_package):
+    package_manager = parse_packages([click_package])
+    classes = list(package_manager.get_classes().values())
+    dot = create_graph(classes)
+
+    assert count_nodes(dot) == len(classes)
+
+
+def test_fallback_engine_threshold():
+    dot = graphviz.Digraph()
+    dot.attr(rankdir='LR')
+    dot.node('a')
+    dot.node('b')
+    dot.edge('a', 'b')
+
+    with RenderScheduler(max_nodes=2) as scheduler:
+        assert scheduler.get_engine(dot) == 'dot'
+
+    with RenderScheduler(max_nodes=1) as scheduler:
+        assert scheduler.get_engine(dot) == 'sfdp'
+
+
+def _make_fake_engine(tmp_path):
+    # writes the source as output, truncating it in place (as dot), and
+    # fails for graphs with a `fail` node
+    path = tmp_path / 'fake_dot'
+    path.write_text(textwrap.dedent(f'''\
+        #!{sys.executable}
+        import sys
+        with open(sys.argv[4]) as source:
+            source = source.read()
+        if 'fail' in source:
+            sys.exit(1)
+        with open(sys.argv[3], 'w') as output:
+            output.write(source)
+        '''))
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_render_cache_hit_is_not_overwritten(tmp_path):
+    engine = _make_fake_engine(tmp_path)
+    cache = RenderCache(tmp_path / 'renders')
+    filename = str(tmp_path / 'diagram')
+
+    first = graphviz.Digraph()
+    first.node('first')
+    second = graphviz.Digraph()
+    second.node('second')
+
+    def render_source(dot):
+        with open(render(dot, filename, engine=engine, cache=cache)) as file:
+            return file.read()
+
+    assert render_source(first) == first.source  # miss
+    assert render_source(first) == first.source  # hit
+    assert render_source(second) == second.source  # miss, same filename
+    assert render_source(first) == first.source  # hit
+
+
+def test_scheduler_collects_failures(tmp_path):
+    engine = _make_fake_engine(tmp_path)
+
+    with RenderScheduler(max_workers=2, max_queued=1, engine=engine) as scheduler:
+        for name in ('first', 'fail', 'second'):
+            dot = graphviz.Digraph()
+            dot.node(name)
+            scheduler.submit(dot, str(tmp_path / name))
+
+        output_paths, failures = scheduler.wait()
+
+    assert output_paths == [str(tmp_path / 'first.svg'), str(tmp_path / 'second.svg')]
+    assert [filename for filename, _ in failures] == [str(tmp_path / 'fail')]
+
+
+def test_dot_process_writer_with_verbose_engine(tmp_path):
+    # more warnings than a pipe holds, before reading the input
+    engine = tmp_path / 'verbose_dot'
+    engine.write_text(textwrap.dedent(f'''\
+        #!{sys.executable}
+        import sys
+        sys.stderr.write('warning\\n' * 100000)
+        sys.stderr.flush()
+        source = sys.stdin.read()
+        with open(sys.argv[3], 'w') as output:
+            output.write(source)
+        sys.exit(1 if 'fail' in source else 0)
+        '''))
+    engine.chmod(0o755)
+
+    output_path = tmp_path / 'diagram.svg'
+    with DotProcessWriter(str(output_path), engine=str(engine), timeout=10) as dot:
+        for index in range(10000):
+            dot.node(f'node_{index}')
+    assert output_path.read_text().count('node_') == 10000
+
+    with pytest.raises(graphviz.CalledProcessError) as excinfo:
+        with DotProcessWriter(str(output_path), engine=str(engine), timeout=10) as dot:
+            dot.node('fail')
+    assert excinfo.value.stderr.startswith('warning')
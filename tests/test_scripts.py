@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+
+import pytest
+
+from calatrava.parser.ast.uml import PackageManager
+from calatrava.scripts import (
+    draw_uml_batch,
+    parse_packages,
+    parse_views,
+)
+from calatrava.viz.graphviz.uml import create_graph
+
+
+EXTERNAL = [(), ('click', 'json')]
+
+
+@pytest.fixture(autouse=True)
+def global_cache_dir(tmp_path, monkeypatch):
+    # installed packages are always cached, even by cold runs
+    path = str(tmp_path / 'global-cache')
+    monkeypatch.setattr('calatrava.scripts.get_global_cache_dir', lambda: path)
+    return path
+
+
+@pytest.fixture
+def parse_cold(get_dot_lines):
+    def _parse_cold(package_path, external):
+        return get_dot_lines(parse_packages([package_path], external=external))
+
+    return _parse_cold
+
+
+@pytest.mark.parametrize('external', EXTERNAL)
+def test_cached_runs_match_cold_run(click_package, tmp_path, external,
+                                    get_dot_lines, parse_cold):
+    expected = parse_cold(click_package, external)
+
+    cache_dir = str(tmp_path / 'cache')
+    for _ in range(2):
+        package_manager = parse_packages([click_package], external=external,
+                                         cache_dir=cache_dir)
+        assert get_dot_lines(package_manager) == expected
+
+
+@pytest.mark.parametrize('external', EXTERNAL)
+def test_incremental_runs_match_cold_run(click_package, tmp_path, external,
+                                         get_dot_lines, parse_cold):
+    cache_dir = str(tmp_path / 'cache')
+
+    def parse_incremental():
+        return get_dot_lines(parse_packages(
+            [click_package], external=external, cache_dir=cache_dir,
+            incremental=True))
+
+    expected = parse_cold(click_package, external)
+    assert parse_incremental() == expected
+    assert parse_incremental() == expected
+
+    # a base changes and a module is added
+    models_path = os.path.join(click_package, 'sub', 'models.py')
+    with open(models_path, 'a') as file:
+        file.write('\n\nclass Other(Model):\n    pass\n')
+    with open(os.path.join(click_package, 'extra.py'), 'w') as file:
+        file.write('from .sub.models import Other\n\n\nclass Extra(Other):\n    pass\n')
+
+    expected = parse_cold(click_package, external)
+    assert any('Extra' in line for line in expected)
+    assert parse_incremental() == expected
+
+    os.remove(os.path.join(click_package, 'extra.py'))
+    assert parse_incremental() == parse_cold(click_package, external)
+
+
+@pytest.mark.parametrize('external', EXTERNAL)
+def test_snapshot_matches_cold_run(click_package, tmp_path, external,
+                                   get_dot_lines, parse_cold):
+    package_manager = parse_packages([click_package], external=external,
+                                     cache_dir=str(tmp_path / 'cache'))
+    package_manager.save(tmp_path / 'calpkg.snapshot')
+    loaded = PackageManager.load(tmp_path / 'calpkg.snapshot')
+
+    assert get_dot_lines(loaded) == parse_cold(click_package, external)
+
+
+def test_incremental_runs_follow_external_changes(make_package, tmp_path,
+                                                  monkeypatch, get_dot_lines,
+                                                  parse_cold):
+    site_path = tmp_path / 'site'
+    make_package({
+        '__init__.py': 'from .base import Base\n',
+        'base.py': 'class Base:\n    pass\n',
+    }, name='site/extpkg')
+    monkeypatch.syspath_prepend(str(site_path))
+
+    package_path = make_package({
+        '__init__.py': '',
+        'child.py': 'from extpkg import Base\n\n\nclass Child(Base):\n    pass\n',
+    })
+    cache_dir = str(tmp_path / 'cache')
+
+    def parse_incremental():
+        return get_dot_lines(parse_packages(
+            [package_path], external=['extpkg'], cache_dir=cache_dir,
+            incremental=True))
+
+    assert parse_incremental() == parse_cold(package_path, ['extpkg'])
+
+    # a base is added to the external class
+    (site_path / 'extpkg' / 'base.py').write_text(
+        'class Root:\n    pass\n\n\nclass Base(Root):\n    pass\n')
+    expected = parse_cold(package_path, ['extpkg'])
+    assert any('Root' in line for line in expected)
+    assert parse_incremental() == expected
+
+    # the external class moves to another module
+    (site_path / 'extpkg' / 'base.py').unlink()
+    (site_path / 'extpkg' / 'core.py').write_text('class Base:\n    pass\n')
+    (site_path / 'extpkg' / '__init__.py').write_text('from .core import Base\n')
+    expected = parse_cold(package_path, ['extpkg'])
+    assert any('extpkg_core_Base' in line for line in expected)
+    assert parse_incremental() == expected
+
+
+def test_batch_views_match_standalone_runs(make_package, get_dot_lines):
+    # `jedipkg` resolves a base from `parsopkg` only if both are given
+    parso_path = make_package({
+        '__init__.py': '',
+        'file_io.py': 'class FileIO:\n    pass\n',
+    }, name='parsopkg')
+    jedi_path = make_package({
+        '__init__.py': '',
+        'common.py': ('from parsopkg.file_io import FileIO\n\n\n'
+                      'class KnownContentFileIO(FileIO):\n    pass\n'),
+    }, name='jedipkg')
+    views_args = [[jedi_path], [parso_path], [jedi_path, parso_path]]
+
+    _, views_classes = parse_views([{'args': args} for args in views_args])
+
+    for args, classes in zip(views_args, views_classes):
+        classes = sorted(classes, key=lambda class_: (class_.name, class_.long_name))
+        assert (sorted(create_graph(classes).source.splitlines())
+                == get_dot_lines(parse_packages(args)))
+
+
+def test_batch_graphs_are_built_as_rendered(click_package, tmp_path, monkeypatch):
+    lock = threading.Lock()
+    counts = {'built': 0, 'rendered': 0, 'max_pending': 0}
+
+    def create_graph_(*args, **kwargs):
+        with lock:
+            counts['built'] += 1
+            counts['max_pending'] = max(counts['max_pending'],
+                                        counts['built'] - counts['rendered'])
+        return create_graph(*args, **kwargs)
+
+    def render(dot, filename, format='svg', **kwargs):
+        time.sleep(0.01)
+        with lock:
+            counts['rendered'] += 1
+        if filename.endswith('3'):
+            raise RuntimeError('timeout')
+        return f'{filename}.{format}'
+
+    monkeypatch.setattr('calatrava.scripts.create_graph', create_graph_)
+    monkeypatch.setattr('calatrava.viz.graphviz.render.render', render)
+
+    views = [{'args': [click_package], 'output_filename': str(tmp_path / str(index))}
+             for index in range(10)]
+    failures = draw_uml_batch(views, render_jobs=1, max_queued=2)
+
+    assert counts['rendered'] == 10
+    # one graph being rendered, two queued and one being submitted
+    assert counts['max_pending'] <= 4
+    assert [filename for filename, _ in failures] == [str(tmp_path / '3')]
+
+
+@pytest.mark.parametrize('imports', [[], ['calpkg.sub', 'calpkg']])
+def test_parallel_run_matches_serial_run(click_package, monkeypatch, imports,
+                                        get_dot_lines):
+    from concurrent.futures import ProcessPoolExecutor
+
+    n_pools = []
+
+    class CountingExecutor(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            n_pools.append(self)
+
+    args = [click_package, *imports]
+    expected = get_dot_lines(parse_packages(args))
+
+    monkeypatch.setattr('calatrava.parser.ast.uml.ProcessPoolExecutor', CountingExecutor)
+    assert get_dot_lines(parse_packages(args, jobs=2)) == expected
+    assert len(n_pools) == 1
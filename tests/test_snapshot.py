@@ -0,0 +1,17 @@
+from calatrava.parser.ast.uml import PackageManager
+from calatrava.scripts import parse_packages
+
+
+def test_snapshot_keeps_external_classes(click_package, tmp_path):
+    package_manager = parse_packages([click_package], external=['click', 'json'],
+                                     cache_dir=str(tmp_path / 'cache'))
+    package_manager.save(tmp_path / 'calpkg.snapshot')
+    loaded = PackageManager.load(tmp_path / 'calpkg.snapshot')
+
+    classes = loaded.get_classes()
+    for long_name in ('click.core.Command', 'click.core.Group',
+                      'json.decoder.JSONDecoder'):
+        assert classes[long_name].found
+
+    assert ([base.long_name for base in classes['calpkg.commands.MyGroup'].bases]
+            == ['click.core.Group'])
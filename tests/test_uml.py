@@ -0,0 +1,144 @@
+import gc
+import logging
+import weakref
+
+import pytest
+
+from calatrava.parser.ast.uml import (
+    BasicClassesVisitor,
+    Package,
+    PackageManager,
+)
+
+
+def test_package_update_inheritance_in_manager(click_package):
+    package = Package(click_package, classes_visitor="basic-attrs-methods")
+    package_manager = PackageManager([package])
+
+    classes = package.find_all_classes()
+    assert package.n_pending_classes > 0
+
+    package.update_inheritance()
+    assert package.n_pending_classes == 0
+    assert all(not class_.get_tmp_bases() for class_ in classes)
+
+    model = package.get_classes()['calpkg.sub.models.Model']
+    assert [base.long_name for base in model.bases] == [
+        'calpkg.sub.models.Base', 'calpkg.commands.MyCommand']
+    assert package_manager.stats['resolution_steps'] > 0
+
+
+def test_standalone_package_update_inheritance(make_package):
+    package = Package(make_package({
+        '__init__.py': '',
+        'base.py': 'class Base:\n    pass\n',
+        'child.py': 'from .base import Base\n\n\nclass Child(Base):\n    pass\n',
+    }))
+
+    package.find_all_classes()
+    package.update_inheritance()
+
+    child = package.get_classes()['calpkg.child.Child']
+    assert [base.long_name for base in child.bases] == ['calpkg.base.Base']
+
+
+def test_classes_visitors_dispatch_is_per_class(click_package):
+    package = Package(click_package, classes_visitor="basic-attrs-methods")
+    package.find_all_classes()
+
+    visitor_type = type(package.find_module('calpkg.commands').classes_visitor)
+    assert visitor_type._visitors is not BasicClassesVisitor._visitors
+    assert visitor_type._visitors
+
+    ref = weakref.ref(visitor_type)
+    del package, visitor_type
+    gc.collect()
+    assert ref() is None
+
+
+def test_negative_cache_counts_only_failed_resolutions(click_package):
+    package = Package(click_package, classes_visitor="basic-attrs-methods")
+    package_manager = PackageManager([package])
+
+    package_manager.find_all_classes()
+    package_manager.update_inheritance()
+
+    negative_cache = package_manager.negative_cache
+    assert len(negative_cache) > 0
+    assert negative_cache.stats['misses'] == len(negative_cache)
+
+
+def test_parse_packages_verbose_logs_stats(click_package, caplog):
+    from calatrava.scripts import parse_packages
+
+    caplog.set_level(logging.INFO)
+    parse_packages([str(click_package)])
+    assert "Negative cache" not in caplog.text
+
+    parse_packages([str(click_package)], verbose=True)
+    assert "Resolved bases" in caplog.text
+    assert "Negative cache" in caplog.text
+
+
+def test_method_lists_are_read_only(click_package):
+    package = Package(click_package, classes_visitor="basic-attrs-methods")
+    PackageManager([package])
+    package.find_all_classes()
+
+    base = package.get_classes()['calpkg.sub.models.Base']
+    method, = base.methods
+    assert method.args_list == ('self',)
+    assert method.decorator_list == ('abstractmethod',)
+    assert method.is_abstractmethod
+
+    # mutating a copy would silently do nothing
+    with pytest.raises(AttributeError):
+        method.decorator_list.append('property')
+
+
+@pytest.fixture
+def star_package(make_package):
+    return make_package({
+        '__init__.py': '',
+        # `__all__` wins over privacy
+        'listed.py': ('__all__ = ["Public", "_Listed"]\n\n\n'
+                      'class Public:\n    pass\n\n\n'
+                      'class _Listed:\n    pass\n\n\n'
+                      'class Hidden:\n    pass\n'),
+        # private names are skipped
+        'unlisted.py': ('class Visible:\n    pass\n\n\n'
+                        'class _Private:\n    pass\n'),
+        # cycle of star imports
+        'cycle_a.py': ('from .cycle_b import *\n\n\n'
+                       'class A:\n    pass\n\n\n'
+                       'class AB(B):\n    pass\n'),
+        'cycle_b.py': ('from .cycle_a import *\n\n\n'
+                       'class B:\n    pass\n'),
+        'user.py': ('from .listed import *\n'
+                    'from .unlisted import *\n'
+                    'from .cycle_a import *\n\n\n'
+                    'class FromListed(Public, _Listed, Hidden):\n    pass\n\n\n'
+                    'class FromUnlisted(Visible, _Private):\n    pass\n\n\n'
+                    'class FromCycle(A, B):\n    pass\n'),
+    }, name='starpkg')
+
+
+def _get_bases(package, long_name):
+    # long names of found bases, names of not found ones
+    return [base.long_name if base.found else base.name
+            for base in package.get_classes()[long_name].bases]
+
+
+def test_star_imports_semantics(star_package):
+    package = Package(star_package, classes_visitor="basic")
+    PackageManager([package])
+    package.find_all_classes()
+    package.update_inheritance()
+
+    assert _get_bases(package, 'starpkg.user.FromListed') == [
+        'starpkg.listed.Public', 'starpkg.listed._Listed', 'Hidden']
+    assert _get_bases(package, 'starpkg.user.FromUnlisted') == [
+        'starpkg.unlisted.Visible', '_Private']
+    assert _get_bases(package, 'starpkg.user.FromCycle') == [
+        'starpkg.cycle_a.A', 'starpkg.cycle_b.B']
+    assert _get_bases(package, 'starpkg.cycle_a.AB') == ['starpkg.cycle_b.B']